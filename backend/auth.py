@@ -1,13 +1,15 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 import os
 
 from database import admin_users_collection
 from models import AdminUser, AdminLogin, Token
+from cache import TTLCache
+from hashing import verify_password
+from invalidation_bus import bus
 
 # Security configurations
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -18,14 +20,45 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Admin documents keyed by token subject, so authorizing a request is an in-memory check.
+# Anything that changes or deactivates an admin user must call revoke_admin();
+# manage_admins.py goes through set_admin_active() and delete_admin(), which do.
+# Edits made straight in the database take up to ADMIN_PRINCIPAL_TTL to apply.
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("ADMIN_PRINCIPAL_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("ADMIN_PRINCIPAL_TTL", "60")),
+)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+def _forget_admins(usernames: Optional[List[str]] = None):
+    if usernames is None:
+        principal_cache.invalidate()
+    else:
+        principal_cache.invalidate(lambda key: key in usernames)
+
+def revoke_admin(username: Optional[str] = None):
+    """Drop the cached principal for ``username`` (every principal if omitted), on every worker"""
+    usernames = None if username is None else [username]
+    _forget_admins(usernames)
+    bus.announce("admins", usernames)
+
+async def set_admin_active(username: str, is_active: bool) -> bool:
+    """Activate or deactivate an admin user; False if there is no such user"""
+    result = await admin_users_collection.update_one({"username": username}, {"$set": {"is_active": is_active}})
+    revoke_admin(username)
+    return result.matched_count > 0
+
+async def delete_admin(username: str) -> bool:
+    """Delete an admin user; False if there is no such user"""
+    result = await admin_users_collection.delete_one({"username": username})
+    revoke_admin(username)
+    return result.deleted_count > 0
+
+async def _admins_changed(usernames: Optional[List[str]], at: Optional[float]):
+    _forget_admins(usernames)
+
+bus.subscribe("admins", _admins_changed)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -41,8 +74,9 @@ async def authenticate_admin(username: str, password: str) -> Optional[dict]:
     admin = await admin_users_collection.find_one({"username": username})
     if not admin:
         return None
-    if not verify_password(password, admin["hashed_password"]):
+    if not await verify_password(password, admin["hashed_password"]):
         return None
+    principal_cache.set(username, admin)
     return admin
 
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
@@ -60,9 +94,12 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
     except JWTError:
         raise credentials_exception
     
-    admin = await admin_users_collection.find_one({"username": username})
+    admin = principal_cache.get(username)
     if admin is None:
-        raise credentials_exception
+        admin = await admin_users_collection.find_one({"username": username})
+        if admin is None:
+            raise credentials_exception
+        principal_cache.set(username, admin)
     if not admin.get("is_active", False):
         raise HTTPException(status_code=400, detail="Inactive admin")
     return admin
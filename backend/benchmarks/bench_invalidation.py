@@ -0,0 +1,82 @@
+"""
+Invalidation bus propagation benchmark
+Starts several InvalidationBus listeners on one invalidations collection, as
+separate uvicorn workers would, announces changes from one of them and
+reports how long each change takes to reach the others (p50/p95/p99/max).
+
+Run from the backend directory:
+    python -m benchmarks.bench_invalidation --announcements 200 --workers 4
+Against the in-process stand-in the listeners poll; pass --mongo-url of a
+replica set to measure change-stream delivery instead.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_routes import percentile, use_database
+
+
+async def run(args):
+    use_database(args.mongo_url)
+    import database
+    import invalidation_bus
+    from invalidation_bus import InvalidationBus
+
+    invalidation_bus.POLL_INTERVAL = args.poll_interval
+    await database.invalidations_collection.delete_many({})
+    sent = {}
+    latencies = []
+    received = asyncio.Event()
+
+    def listener(name: str) -> InvalidationBus:
+        bus = InvalidationBus(database.invalidations_collection, worker=name)
+
+        async def changed(keys, at):
+            for key in keys or ():
+                latencies.append((time.perf_counter() - sent[key]) * 1000)
+            if len(latencies) >= args.announcements * (args.workers - 1):
+                received.set()
+
+        bus.subscribe("bench", changed)
+        return bus
+
+    buses = [listener(f"worker-{i}") for i in range(args.workers)]
+    for bus in buses:
+        await bus.start()
+    await asyncio.sleep(args.poll_interval * 2)
+
+    writer = buses[0]
+    for i in range(args.announcements):
+        key = str(i)
+        sent[key] = time.perf_counter()
+        writer.announce("bench", [key])
+        await asyncio.sleep(args.interval)
+    try:
+        await asyncio.wait_for(received.wait(), timeout=10)
+    except asyncio.TimeoutError:
+        print("⚠️  Not every announcement arrived within 10 s")
+    for bus in buses:
+        await bus.stop()
+
+    latencies.sort()
+    mode = buses[1].stats["mode"] if len(buses) > 1 else None
+    print(f"📡 {len(latencies)} deliveries to {args.workers - 1} workers ({mode})")
+    if latencies:
+        print(
+            f"   p50 {percentile(latencies, 0.50):8.2f} ms  p95 {percentile(latencies, 0.95):8.2f} ms  "
+            f"p99 {percentile(latencies, 0.99):8.2f} ms  max {latencies[-1]:8.2f} ms"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Invalidation bus propagation benchmark")
+    parser.add_argument("--announcements", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4, help="listeners, one of which announces")
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between announcements")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="INVALIDATION_POLL_INTERVAL")
+    parser.add_argument("--mongo-url", help="use a real MongoDB instead of the in-process stand-in")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,106 @@
+"""
+Catalog latency while bcrypt logins are in flight
+The app from server.py is booted against the in-process MongoDB stand-in (or
+--mongo-url) with a small synthetic catalog. GET /api/products/ requests are
+sent through it every few milliseconds while a burst of POST /api/auth/login
+requests runs, first with bcrypt inline on the event loop (as before the
+hashing pool) and then through the hashing pool.
+Run from the backend directory: python -m benchmarks.bench_login_load
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from benchmarks.bench_routes import use_database
+
+LOGINS = 8
+CATALOG_INTERVAL = 0.002
+CATALOG_URL = "/api/products/?limit=50"
+CREDENTIALS = {"username": "admin", "password": "admin123"}
+
+
+async def inline_verify(plain_password: str, hashed_password: str) -> bool:
+    import hashing
+    return hashing.crypt_context().verify(plain_password, hashed_password)
+
+
+async def measure(client):
+    latencies = []
+    failures = 0
+    finished = asyncio.Event()
+
+    async def catalog_load():
+        nonlocal failures
+        # Open loop: requests arrive on a fixed schedule whether or not the loop is free,
+        # so time spent blocked behind bcrypt counts towards their latency
+        arrival = time.perf_counter()
+        while not finished.is_set() or arrival < time.perf_counter():
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            response = await client.get(CATALOG_URL)
+            failures += response.status_code != 200
+            latencies.append((time.perf_counter() - arrival) * 1000)
+            arrival += CATALOG_INTERVAL
+
+    load = asyncio.create_task(catalog_load())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    logins = await asyncio.gather(*(client.post("/api/auth/login", json=CREDENTIALS) for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    finished.set()
+    await load
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "failures": failures + sum(response.status_code != 200 for response in logins),
+        "p50": statistics.median(latencies),
+        "p99": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+        "max": latencies[-1],
+        "elapsed": elapsed,
+    }
+
+
+async def main(args):
+    use_database(args.mongo_url)
+    import httpx
+    import auth
+    import catalog_events
+    import database
+    import hashing
+    import server
+    from synthetic_catalog import seed
+
+    # One access log line per request would drown the results
+    logging.disable(logging.INFO)
+    async with server.app.router.lifespan_context(server.app):
+        await seed(database.db, args.categories, args.products, 0, reset=True)
+        await catalog_events.load_views()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"🔐 {LOGINS} concurrent logins, {hashing.HASH_WORKERS} hashing workers, {args.products} products")
+            pooled = auth.verify_password
+            for label, verify in (("inline", inline_verify), ("pooled", pooled)):
+                auth.verify_password = verify
+                result = await measure(client)
+                print(
+                    f"   - {label}: logins took {result['elapsed']:.2f}s, {result['requests']} catalog requests, "
+                    f"p50 {result['p50']:.3f} ms, p99 {result['p99']:.3f} ms, max {result['max']:.1f} ms"
+                    + (f", {result['failures']} failed" if result["failures"] else "")
+                )
+            auth.verify_password = pooled
+    print(f"   - pool stats: {hashing.stats}")
+    hashing.shutdown()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Catalog latency during a login burst")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--mongo-url", help="use a real MongoDB instead of the in-process stand-in (its database is replaced)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,100 @@
+"""
+Metrics instrumentation overhead benchmark
+Measures what metrics.py adds to the hot path:
+- MetricsMiddleware around a minimal ASGI endpoint, against the bare endpoint
+- CommandMetrics handling one started/succeeded event pair per MongoDB command
+- PoolMetrics handling one checkout/check-in cycle
+
+Run from the backend directory:
+    python -m benchmarks.bench_metrics --iterations 200000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import timedelta
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "gold_benchmark")
+
+from pymongo import monitoring
+
+from metrics import CommandMetrics, MetricsMiddleware, PoolMetrics
+
+ADDRESS = ("localhost", 27017)
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def time_app(app, iterations: int) -> float:
+    """Mean microseconds per request"""
+    scope = {"type": "http", "method": "GET", "path": "/api/bench", "headers": []}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def time_commands(iterations: int) -> float:
+    listener = CommandMetrics()
+    command = {"find": "products", "filter": {"id": "sample"}}
+    started_events = [
+        monitoring.CommandStartedEvent(command, "gold", request_id, ADDRESS, request_id) for request_id in range(iterations)
+    ]
+    succeeded_events = [
+        monitoring.CommandSucceededEvent(timedelta(microseconds=350), {"ok": 1}, "find", request_id, ADDRESS, request_id)
+        for request_id in range(iterations)
+    ]
+    started = time.perf_counter()
+    for start, success in zip(started_events, succeeded_events):
+        listener.started(start)
+        listener.succeeded(success)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def time_checkouts(iterations: int) -> float:
+    listener = PoolMetrics()
+    check_out_started = monitoring.ConnectionCheckOutStartedEvent(ADDRESS)
+    checked_out = monitoring.ConnectionCheckedOutEvent(ADDRESS, 1)
+    checked_in = monitoring.ConnectionCheckedInEvent(ADDRESS, 1)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        listener.connection_check_out_started(check_out_started)
+        listener.connection_checked_out(checked_out)
+        listener.connection_checked_in(checked_in)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def run(args):
+    instrumented = MetricsMiddleware(endpoint)
+    bare, timed = [], []
+    for _ in range(args.rounds):
+        bare.append(await time_app(endpoint, args.iterations))
+        timed.append(await time_app(instrumented, args.iterations))
+    bare_us, timed_us = statistics.median(bare), statistics.median(timed)
+    print(f"🌐 request   bare {bare_us:6.2f} µs  instrumented {timed_us:6.2f} µs  overhead {timed_us - bare_us:6.2f} µs")
+    print(f"🍃 command   {statistics.median(time_commands(args.iterations) for _ in range(args.rounds)):6.2f} µs per started/succeeded pair")
+    print(f"🔌 checkout  {statistics.median(time_checkouts(args.iterations) for _ in range(args.rounds)):6.2f} µs per checkout/check-in")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Metrics instrumentation overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=5, help="repetitions; the median is reported")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
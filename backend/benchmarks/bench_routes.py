@@ -0,0 +1,429 @@
+"""
+Route-level latency benchmark
+Boots the FastAPI app from server.py against an in-process MongoDB stand-in
+(mongomock-motor) seeded with a synthetic catalog, drives every route with
+concurrent clients and reports p50/p95/p99 latency, throughput and traced
+allocations per request. Results are written as JSON; pass --compare with an
+earlier result to see the change per route.
+
+Run from the backend directory:
+    python -m benchmarks.bench_routes --products 5000 --output bench.json
+    python -m benchmarks.bench_routes --compare bench.json
+Use --mongo-url to run against a real mongod instead (its database is replaced).
+
+Requests go through httpx's in-process ASGI transport, which waits for
+background tasks, so image uploads include rendering their variants.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "gold_benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="bench-uploads-"))
+
+import database
+
+COLLECTIONS = ("categories", "products", "contact_forms", "admin_users", "invalidations")
+
+
+def use_database(mongo_url=None):
+    """Point database.py at the stand-in (or a real server) before the routes import it"""
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("❌ mongomock-motor is not installed; pip install mongomock-motor or pass --mongo-url")
+        client = AsyncMongoMockClient()
+    database.client = client
+    database.db = client[os.environ["DB_NAME"]]
+    for name in COLLECTIONS:
+        setattr(database, f"{name}_collection", database.db[name])
+
+
+def png_bytes() -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), (180, 140, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def product_payload(category_id: str, i: int) -> dict:
+    return {
+        "category_id": category_id,
+        "name": {"tr": f"Benchmark Ürün {i}", "en": f"Benchmark Product {i}"},
+        "description": {"tr": "Açıklama", "en": "Description"},
+        "specs": {"power": "6 KW", "voltage": "220V"},
+        "features": {"tr": ["Paslanmaz çelik"], "en": ["Stainless steel"]},
+    }
+
+
+class Scenarios:
+    """Request lists per route; write routes create what they consume before timing starts"""
+
+    def __init__(self, client, admin: dict, catalog: dict):
+        self.client = client
+        self.admin = admin
+        self.catalog = catalog
+        self.counter = 0
+
+    def _next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    async def _product(self) -> str:
+        response = await self.client.post(
+            "/api/products/", json=product_payload(self.catalog["category_id"], self._next()), headers=self.admin
+        )
+        return response.json()["id"]
+
+    async def _category(self) -> str:
+        i = self._next()
+        response = await self.client.post(
+            "/api/categories/",
+            json={"name": {"tr": f"Kategori {i}"}, "description": {"tr": "-"}, "slug": f"bench-{i}"},
+            headers=self.admin,
+        )
+        return response.json()["id"]
+
+    async def _contacts(self, count: int) -> list:
+        ids = [(await self.client.post("/api/contact/", json=self._contact_payload())).json()["id"] for _ in range(count)]
+        # Submissions are written behind; let the writer flush them before they are used
+        import contact_queue
+        await asyncio.sleep(contact_queue.FLUSH_INTERVAL + 0.2)
+        return ids
+
+    def _contact_payload(self) -> dict:
+        return {"name": "Bench", "email": "bench@example.com", "phone": "1", "message": f"Mesaj {self._next()}"}
+
+    async def build(self, name: str, count: int):
+        """``count`` (method, url, kwargs) tuples for one scenario"""
+        admin, catalog = self.admin, self.catalog
+        product_id, category_id = catalog["product_id"], catalog["category_id"]
+        if name == "GET /products":
+            return [("GET", "/api/products/", {})] * count
+        if name == "GET /products?category_id&limit=50":
+            return [("GET", f"/api/products/?category_id={category_id}&limit=50", {})] * count
+        if name == "GET /products?after":
+            return [("GET", f"/api/products/?limit=50&after={catalog['cursor']}", {})] * count
+        if name == "GET /products?lang&fields":
+            return [("GET", "/api/products/?lang=en&fields=name,specs&limit=100", {})] * count
+        if name == "GET /products (uncached)":
+            # A distinct limit per request misses the rendered-body cache
+            return [("GET", f"/api/products/?limit={100 + i % 900}", {}) for i in range(count)]
+        if name == "GET /products/{id}":
+            return [("GET", f"/api/products/{product_id}", {})] * count
+        if name == "GET /products/search":
+            words = ("buhar", "vakum", "steam", "ütü", "pres", "otomatik")
+            return [("GET", f"/api/products/search?q={words[i % len(words)]}&lang=tr", {}) for i in range(count)]
+        if name == "GET /products/facets":
+            return [("GET", f"/api/products/facets?category_id={category_id}&spec=voltage:220V", {})] * count
+        if name == "GET /products/export":
+            return [("GET", "/api/products/export", {"headers": admin})] * count
+        if name == "GET /products/{id}/images/{i}":
+            return [("GET", f"/api/products/{catalog['image_product_id']}/images/0?width=640", {})] * count
+        if name == "POST /products":
+            return [("POST", "/api/products/", {"json": product_payload(category_id, self._next()), "headers": admin})
+                    for _ in range(count)]
+        if name == "POST /products/import":
+            body = "\n".join(json.dumps(product_payload(category_id, self._next())) for _ in range(100))
+            return [("POST", "/api/products/import", {"content": body, "headers": admin})] * count
+        if name == "PUT /products/{id}":
+            return [("PUT", f"/api/products/{product_id}", {"json": {"price": f"{i} TL"}, "headers": admin})
+                    for i in range(count)]
+        if name == "DELETE /products/{id}":
+            ids = [await self._product() for _ in range(count)]
+            return [("DELETE", f"/api/products/{pid}", {"headers": admin}) for pid in ids]
+        if name == "POST /products/{id}/images":
+            ids = [await self._product() for _ in range(count)]
+            files = {"file": ("bench.png", catalog["png"], "image/png")}
+            return [("POST", f"/api/products/{pid}/images", {"files": files, "headers": admin}) for pid in ids]
+        if name == "DELETE /products/{id}/images/{i}":
+            ids = [await self._product() for _ in range(count)]
+            for pid in ids:
+                await self.client.put(f"/api/products/{pid}", json={"images": ["https://example.com/a.jpg"]}, headers=admin)
+            return [("DELETE", f"/api/products/{pid}/images/0", {"headers": admin}) for pid in ids]
+        if name == "GET /categories":
+            return [("GET", "/api/categories/", {})] * count
+        if name == "GET /categories/{id}":
+            return [("GET", f"/api/categories/{category_id}", {})] * count
+        if name == "POST /categories":
+            return [("POST", "/api/categories/", {
+                "json": {"name": {"tr": "K"}, "description": {"tr": "-"}, "slug": f"bench-new-{self._next()}"},
+                "headers": admin,
+            }) for _ in range(count)]
+        if name == "PUT /categories/{id}":
+            return [("PUT", f"/api/categories/{category_id}", {
+                "json": {"name": {"tr": f"Kategori {i}"}, "description": {"tr": "-"}, "slug": catalog["category_slug"]},
+                "headers": admin,
+            }) for i in range(count)]
+        if name == "DELETE /categories/{id}":
+            ids = [await self._category() for _ in range(count)]
+            return [("DELETE", f"/api/categories/{cid}", {"headers": admin}) for cid in ids]
+        if name == "POST /contact":
+            return [("POST", "/api/contact/", {"json": self._contact_payload()}) for _ in range(count)]
+        if name == "GET /contact":
+            return [("GET", "/api/contact/?limit=50", {"headers": admin})] * count
+        if name == "GET /contact/counts":
+            return [("GET", "/api/contact/counts", {"headers": admin})] * count
+        if name == "GET /contact/summaries":
+            return [("GET", "/api/contact/summaries?limit=50", {"headers": admin})] * count
+        if name in ("PUT /contact/mark-read (bulk)", "POST /contact/delete (bulk)"):
+            ids = await self._contacts(count * BULK_SIZE)
+            batches = [ids[i:i + BULK_SIZE] for i in range(0, len(ids), BULK_SIZE)]
+            if name.startswith("PUT"):
+                return [("PUT", "/api/contact/mark-read", {"headers": admin, "json": {"ids": batch}}) for batch in batches]
+            return [("POST", "/api/contact/delete", {"headers": admin, "json": {"ids": batch}}) for batch in batches]
+        if name == "PUT /contact/{id}/mark-read":
+            ids = await self._contacts(count)
+            return [("PUT", f"/api/contact/{cid}/mark-read", {"headers": admin}) for cid in ids]
+        if name == "DELETE /contact/{id}":
+            ids = await self._contacts(count)
+            return [("DELETE", f"/api/contact/{cid}", {"headers": admin}) for cid in ids]
+        if name == "POST /auth/login":
+            return [("POST", "/api/auth/login", {"json": {"username": "admin", "password": "admin123"}})] * count
+        if name == "GET /auth/me":
+            return [("GET", "/api/auth/me", {"headers": admin})] * count
+        if name == "GET /products?profile=1":
+            # The sampler thread and the profile write are the cost being measured
+            return [("GET", "/api/products/?limit=50&profile=1", {"headers": admin})] * count
+        if name == "GET /profiles/{id}":
+            response = await self.client.get("/api/products/?limit=50", headers={**admin, "X-Profile": "1"})
+            return [("GET", f"/api/profiles/{response.headers['x-profile-id']}", {"headers": admin})] * count
+        if name == "GET /health/live":
+            return [("GET", "/api/health/live", {})] * count
+        if name == "GET /health/ready":
+            return [("GET", "/api/health/ready", {})] * count
+        raise KeyError(name)
+
+
+# Scenario name -> share of --requests (bcrypt and uploads are far slower than reads)
+# Contact forms per bulk mark-read/delete request
+BULK_SIZE = 50
+
+SCENARIOS = {
+    "GET /products": 1,
+    "GET /products?category_id&limit=50": 1,
+    "GET /products?after": 1,
+    "GET /products?lang&fields": 1,
+    "GET /products (uncached)": 0.2,
+    "GET /products/{id}": 1,
+    "GET /products/search": 1,
+    "GET /products/facets": 1,
+    "GET /products/export": 0.05,
+    "GET /products/{id}/images/{i}": 1,
+    "POST /products": 0.5,
+    "POST /products/import": 0.05,
+    "PUT /products/{id}": 0.5,
+    "DELETE /products/{id}": 0.5,
+    "POST /products/{id}/images": 0.05,
+    "DELETE /products/{id}/images/{i}": 0.2,
+    "GET /categories": 1,
+    "GET /categories/{id}": 1,
+    "POST /categories": 0.5,
+    "PUT /categories/{id}": 0.5,
+    "DELETE /categories/{id}": 0.5,
+    "POST /contact": 0.5,
+    "GET /contact": 1,
+    "PUT /contact/{id}/mark-read": 0.5,
+    "DELETE /contact/{id}": 0.5,
+    "GET /contact/counts": 1,
+    "GET /contact/summaries": 1,
+    "PUT /contact/mark-read (bulk)": 0.05,
+    "POST /contact/delete (bulk)": 0.05,
+    # Admin users are deactivated or deleted with manage_admins.py; there are no HTTP routes for it
+    "POST /auth/login": 0.05,
+    "GET /auth/me": 1,
+    "GET /products?profile=1": 0.2,
+    "GET /profiles/{id}": 1,
+    "GET /health/live": 1,
+    "GET /health/ready": 1,
+}
+
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_concurrent(client, requests, concurrency: int):
+    latencies, errors = [], 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, url, kwargs in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def allocations_per_request(client, requests) -> float:
+    """Mean peak traced memory (KiB) above the baseline while one request is handled"""
+    tracemalloc.start()
+    peaks = []
+    try:
+        for method, url, kwargs in requests:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await client.request(method, url, **kwargs)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) / 1024 if peaks else 0.0
+
+
+async def prepare_catalog(client, admin: dict, args) -> dict:
+    from synthetic_catalog import seed
+
+    # The benchmark owns its database, so whatever an earlier run left is replaced
+    await seed(database.db, args.categories, args.products, args.contacts, args.seed, reset=True)
+    import catalog_events
+    await catalog_events.load_views()
+
+    category = await database.categories_collection.find_one({}, sort=[("created_at", 1)])
+    first_page = await client.get("/api/products/?limit=50")
+    image_product = await client.post(
+        "/api/products/", json=product_payload(category["id"], 0), headers=admin
+    )
+    png = png_bytes()
+    image_product_id = image_product.json()["id"]
+    await client.post(
+        f"/api/products/{image_product_id}/images",
+        files={"file": ("bench.png", png, "image/png")}, headers=admin,
+    )
+    return {
+        "category_id": category["id"],
+        "category_slug": category["slug"],
+        "product_id": first_page.json()[0]["id"],
+        "cursor": first_page.headers["x-next-cursor"],
+        "image_product_id": image_product_id,
+        "png": png,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    use_database(args.mongo_url)
+    import httpx
+    import server
+
+    selected = [name for name in SCENARIOS if not args.routes or any(part in name for part in args.routes)]
+    results = {}
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            token = (await client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})).json()
+            admin = {"Authorization": f"Bearer {token['access_token']}"}
+            print(f"🌱 Seeding {args.products} products, {args.categories} categories, {args.contacts} contact forms...")
+            scenarios = Scenarios(client, admin, await prepare_catalog(client, admin, args))
+
+            for name in selected:
+                count = max(args.concurrency, int(args.requests * SCENARIOS[name]))
+                warmup = await scenarios.build(name, min(10, count))
+                await run_concurrent(client, warmup, args.concurrency)
+                requests = await scenarios.build(name, count)
+                latencies, errors, elapsed = await run_concurrent(client, requests, args.concurrency)
+                allocations = await allocations_per_request(client, await scenarios.build(name, min(20, count)))
+
+                latencies.sort()
+                results[name] = {
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "p50_ms": round(percentile(latencies, 0.50), 3),
+                    "p95_ms": round(percentile(latencies, 0.95), 3),
+                    "p99_ms": round(percentile(latencies, 0.99), 3),
+                    "max_ms": round(latencies[-1], 3),
+                    "throughput_rps": round(len(latencies) / elapsed, 1),
+                    "alloc_kib_per_request": round(allocations, 1),
+                }
+                row = results[name]
+                print(
+                    f"{'❌' if errors else '✅'} {name:36} p50 {row['p50_ms']:8.2f} ms  p95 {row['p95_ms']:8.2f} ms  "
+                    f"p99 {row['p99_ms']:8.2f} ms  {row['throughput_rps']:8.1f} req/s  {row['alloc_kib_per_request']:8.1f} KiB"
+                    + (f"  {errors} errors" if errors else "")
+                )
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "database": "mongod" if args.mongo_url else "mongomock-motor",
+            "products": args.products,
+            "categories": args.categories,
+            "contact_forms": args.contacts,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "routes": results,
+    }
+
+
+def compare(previous: dict, current: dict):
+    print(f"\n📊 {previous['meta']['commit']} -> {current['meta']['commit']}")
+    for name, row in current["routes"].items():
+        old = previous["routes"].get(name)
+        if not old:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p99_ms", "throughput_rps", "alloc_kib_per_request"):
+            if old[metric]:
+                changes.append(f"{metric} {(row[metric] - old[metric]) / old[metric] * 100:+6.1f}%")
+        print(f"   - {name:36} {'  '.join(changes)}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Route-level latency benchmark")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="requests per read route; writes use a share of it")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--routes", nargs="*", help="only run scenarios whose name contains one of these")
+    parser.add_argument("--mongo-url", help="use a real MongoDB instead of the in-process stand-in")
+    parser.add_argument("--output", default="bench_routes.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    result = asyncio.run(run(args))
+    Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"\n💾 Results written to {args.output}")
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the validated and trusted read paths on a 1000-product listing
+Run from the backend directory: python -m benchmarks.bench_serialization
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models import Product
+from serialization import list_adapter
+
+PRODUCT_COUNT = 1000
+ROUNDS = 20
+
+
+def make_products(count: int) -> List[dict]:
+    base = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": i,
+            "id": f"prod-{i}",
+            "category_id": f"cat-{i % 4}",
+            "name": {
+                "tr": f"GOLD {i} KW Buhar Jeneratörü",
+                "en": f"GOLD {i} KW Steam Generator",
+                "ar": f"مولد البخار GOLD {i}",
+                "ru": f"Парогенератор GOLD {i}",
+            },
+            "description": {
+                "tr": "Kompakt ve güçlü profesyonel istim makinası",
+                "en": "Compact and powerful professional steam machine",
+                "ar": "آلة بخار احترافية مدمجة وقوية",
+                "ru": "Компактная и мощная профессиональная паровая машина",
+            },
+            "specs": {"power": f"{i % 12} KW", "voltage": "220V" if i % 2 else "380V", "weight": f"{i % 90} kg"},
+            "features": {
+                "tr": ["Paslanmaz çelik", "CE sertifikalı"],
+                "en": ["Stainless steel", "CE certified"],
+                "ar": ["فولاذ مقاوم للصدأ", "شهادة CE"],
+                "ru": ["Нержавеющая сталь", "Сертифицирован CE"],
+            },
+            "images": [f"/api/uploads/prod-{i}.jpg"],
+            "price": "Fiyat için iletişime geçin",
+            "is_active": True,
+            "created_at": base + timedelta(minutes=i),
+            "updated_at": base + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+async def validated(docs, field) -> bytes:
+    """What the routes did before: Product(**doc), then response_model validation and encoding"""
+    content = await serialize_response(field=field, response_content=[Product(**doc) for doc in docs])
+    return JSONResponse(content).body
+
+
+def trusted(docs) -> bytes:
+    return list_adapter(Product).dump_json([Product.model_construct(**doc) for doc in docs])
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    docs = make_products(PRODUCT_COUNT)
+    field = create_response_field(name="response", type_=List[Product])
+    loop = asyncio.new_event_loop()
+
+    validated_ms = timed(lambda: loop.run_until_complete(validated(docs, field)), ROUNDS)
+    trusted_ms = timed(lambda: trusted(docs), ROUNDS)
+    loop.close()
+
+    print(f"📦 {PRODUCT_COUNT} products, {ROUNDS} rounds (CPU time per request)")
+    print(f"   - validated: {validated_ms:8.2f} ms")
+    print(f"   - trusted:   {trusted_ms:8.2f} ms")
+    print(f"   - saved:     {validated_ms - trusted_ms:8.2f} ms ({validated_ms / trusted_ms:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cold-start benchmark
+Every boot runs in a fresh interpreter, as a worker does when it is deployed
+or restarted. Per run it reports:
+- first boot: the database has no index fingerprint (a new deployment or a
+  changed registry), so indexes are reconciled and the default admin is created,
+- restart: a new process against the database the first boot left behind,
+  which is what every worker of a rolling restart goes through.
+Each boot is split into import (server.py and everything it pulls in) and
+startup (the startup event), and "to ready" is the wall time the parent
+measured from spawning the process until startup finished, interpreter start
+included. The median over --runs is printed.
+
+The in-process stand-in does not outlive a process, so the first boot saves
+the documents startup reads back (index fingerprint, admin users) and the
+restart process loads them before it is timed. Against the stand-in, database
+calls cost next to nothing; use --mongo-url to see the round trips a restart
+saves (its database is replaced).
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RESULT_PREFIX = "STARTUP_RESULT "
+# What a restart finds in the database, carried between stand-in processes
+STATE_COLLECTIONS = ("meta", "admin_users")
+
+
+def child(args):
+    started = time.perf_counter()
+    from benchmarks.bench_routes import use_database
+
+    use_database(args.mongo_url)
+    import database
+
+    import asyncio
+    import logging
+    from bson import json_util
+    logging.disable(logging.CRITICAL)
+
+    async def restore():
+        with open(args.state) as state:
+            for name, docs in json_util.loads(state.read()).items():
+                if docs:
+                    await database.db[name].insert_many(docs)
+
+    async def save():
+        state = {name: await database.db[name].find().to_list(None) for name in STATE_COLLECTIONS}
+        with open(args.state, "w") as out:
+            out.write(json_util.dumps(state))
+
+    async def boot():
+        seed_ms = 0.0
+        if args.phase == "first":
+            await database.db["meta"].delete_many({})
+            await database.admin_users_collection.delete_many({"username": "admin"})
+        elif not args.mongo_url:
+            # Setting up the stand-in is not part of the restart, so it is left out of the timings
+            seed_started = time.perf_counter()
+            await restore()
+            seed_ms = (time.perf_counter() - seed_started) * 1000
+        import server
+        import_ms = (time.perf_counter() - started) * 1000 - seed_ms
+
+        boot_started = time.perf_counter()
+        async with server.app.router.lifespan_context(server.app):
+            startup_ms = (time.perf_counter() - boot_started) * 1000
+            print(RESULT_PREFIX + json.dumps({"import_ms": import_ms, "startup_ms": startup_ms, "seed_ms": seed_ms}), flush=True)
+            if args.phase == "first" and not args.mongo_url:
+                await save()
+
+    asyncio.run(boot())
+
+
+def spawn(args, phase: str, state: str) -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--child", phase, "--state", state]
+    if args.mongo_url:
+        command += ["--mongo-url", args.mongo_url]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    result = None
+    for line in process.stdout:
+        if result is None and line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            result["ready_ms"] = (time.perf_counter() - started) * 1000 - result.pop("seed_ms")
+    if process.wait() != 0 or result is None:
+        sys.exit(f"❌ {phase} boot failed")
+    return result
+
+
+def _row(result: dict) -> str:
+    return f"import {result['import_ms']:7.1f} ms  startup {result['startup_ms']:7.1f} ms  to ready {result['ready_ms']:7.1f} ms"
+
+
+def run(args):
+    runs = {"first": [], "restart": []}
+    with tempfile.TemporaryDirectory() as directory:
+        state = os.path.join(directory, "state.json")
+        for i in range(args.runs):
+            for phase in runs:
+                runs[phase].append(spawn(args, phase, state))
+                print(f"   run {i + 1} {phase:10} {_row(runs[phase][-1])}")
+    for phase, results in runs.items():
+        medians = {key: statistics.median(result[key] for result in results) for key in results[0]}
+        print(f"🚀 median {phase:10} {_row(medians)}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mongo-url", help="use a real MongoDB instead of the in-process stand-in")
+    parser.add_argument("--child", choices=("first", "restart"), dest="phase", help=argparse.SUPPRESS)
+    parser.add_argument("--state", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.phase:
+        child(args)
+    else:
+        run(args)
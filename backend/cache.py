@@ -0,0 +1,107 @@
+"""
+In-process caches for hot read paths.
+The catalog changes a few times a day but is read constantly, so listings are
+kept in memory and dropped precisely whenever an admin write touches them.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+import os
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl`` seconds after being set"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Drop every entry whose key matches ``predicate`` (all entries if omitted)"""
+        if predicate is None:
+            self._data.clear()
+            return
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Catalog cache keys are tuples whose first item names the resource:
+#   ("products", category_id, is_active, limit, after, lang, fields, specs)
+#   ("product", product_id, lang, fields)
+#   ("categories", lang, fields)
+#   ("category", category_id, lang, fields)
+catalog_cache = TTLCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "300")),
+)
+
+# Deletions do not show up in any document timestamp, so listings never report
+# a Last-Modified older than the last catalog change. catalog_events.py only
+# moves it to times every worker sees alike (document timestamps and the times
+# changes were announced on the invalidation bus), so all workers and restarts
+# report the same Last-Modified for the same data. None until the first load.
+_catalog_changed_at: Optional[datetime] = None
+
+
+def catalog_last_changed() -> Optional[datetime]:
+    return _catalog_changed_at
+
+
+def catalog_changed(at: Optional[datetime]):
+    """Move the Last-Modified floor of catalog listings up to ``at``"""
+    global _catalog_changed_at
+    if at is not None and (_catalog_changed_at is None or at > _catalog_changed_at):
+        _catalog_changed_at = at
+
+
+def invalidate_products(*category_ids, product_id: str = None, product_ids=()):
+    """Drop cached product listings that may contain products of the given categories"""
+    affected = set(category_ids)
+    products = set(product_ids)
+    if product_id is not None:
+        products.add(product_id)
+    catalog_cache.invalidate(
+        lambda key: (key[0] == "products" and (key[1] is None or key[1] in affected))
+        or (key[0] == "product" and key[1] in products)
+    )
+
+
+def invalidate_categories(category_id: str = None):
+    """Drop cached category listings and the given category"""
+    catalog_cache.invalidate(
+        lambda key: key[0] == "categories" or key[:2] == ("category", category_id)
+    )
+
+
+def invalidate_catalog():
+    """Drop every cached catalog response, after the catalog was reloaded as a whole"""
+    catalog_cache.invalidate()
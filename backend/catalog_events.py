@@ -0,0 +1,223 @@
+"""
+Catalog change notifications.
+Every write path reports what it changed here, and this module updates the
+in-memory views of the catalog (read snapshot, read caches, search index,
+spec facets) in one place, then announces the change to the other workers
+through the invalidation bus, which calls back here with the changed ids.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio
+import logging
+import os
+
+from cache import catalog_changed, invalidate_catalog, invalidate_categories, invalidate_products
+from database import categories_collection, products_collection
+from facets import facet_index
+from http_cache import last_modified
+from invalidation_bus import bus
+from search import search_index
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+# Backstop for writes the invalidation bus never saw (scripts, the mongo shell).
+# Every SNAPSHOT_REFRESH_SECONDS a probe (document counts and the newest updated_at)
+# is compared with the one taken at the last load, and the views are only reloaded
+# when it differs. Edits the probe cannot see are picked up by a full reload every
+# FULL_RELOAD_SECONDS. 0 turns either off.
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_REFRESH_SECONDS", "60"))
+FULL_RELOAD_SECONDS = float(os.getenv("CATALOG_FULL_RELOAD_SECONDS", "21600"))
+
+# Bumped on every write, so a reload that raced with a write is discarded
+_writes = 0
+# When the views were last read in full from MongoDB; None until the first load
+loaded_at: Optional[datetime] = None
+# The probe taken right before that load
+_loaded_probe: Optional[tuple] = None
+
+
+def _written():
+    global _writes
+    _writes += 1
+
+
+def _apply_products(saved=(), deleted=(), previous_category_ids=()):
+    _written()
+    published = snapshot.current().with_products(saved, [doc["id"] for doc in deleted])
+    snapshot.publish(published)
+    category_ids = set(previous_category_ids) | {doc.get("category_id") for doc in [*saved, *deleted]} - {None}
+    invalidate_products(*category_ids, product_ids=[doc["id"] for doc in [*saved, *deleted]])
+    # A saved document the snapshot skipped as malformed leaves the other views too
+    for doc in saved:
+        if doc["id"] in published.product_by_id:
+            search_index.add(published.product_by_id[doc["id"]])
+            facet_index.add(published.product_by_id[doc["id"]])
+        else:
+            deleted = [*deleted, doc]
+    for doc in deleted:
+        search_index.remove(doc["id"])
+        facet_index.remove(doc["id"])
+
+
+def _apply_category(saved: Optional[dict] = None, deleted: Optional[dict] = None):
+    _written()
+    snapshot.publish(snapshot.current().with_category(saved=saved, deleted_id=deleted and deleted["id"]))
+    invalidate_categories((saved or deleted)["id"])
+
+
+def _announce(kind: str, keys: List[str], saved=()):
+    """
+    Move the Last-Modified floor to the time of the change and announce it with
+    that time, so the other workers move theirs to the same one. A write is
+    dated by the documents it saved, a deletion by the clock.
+    """
+    at = last_modified(saved) or datetime.utcnow()
+    catalog_changed(at)
+    bus.announce(kind, keys, at.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _announced(at: Optional[float]):
+    """A change another worker announced happened at ``at``"""
+    if at is not None:
+        catalog_changed(datetime.fromtimestamp(at, timezone.utc).replace(tzinfo=None))
+
+
+def product_saved(doc: dict, previous: Optional[dict] = None):
+    """A product was created or updated; ``doc`` is the stored document after the write"""
+    _apply_products([doc], previous_category_ids=[previous["category_id"]] if previous is not None else ())
+    _announce("products", [doc["id"]], [doc])
+
+
+def products_saved(docs: List[dict], previous_category_ids=()):
+    """Many products were written at once (bulk import); one cache invalidation for the batch"""
+    _apply_products(docs, previous_category_ids=previous_category_ids)
+    _announce("products", [doc["id"] for doc in docs], docs)
+
+
+def product_deleted(doc: dict):
+    _apply_products(deleted=[doc])
+    _announce("products", [doc["id"]])
+
+
+def category_saved(doc: dict):
+    """A category was created or updated; ``doc`` is the stored document after the write"""
+    _apply_category(saved=doc)
+    _announce("categories", [doc["id"]], [doc])
+
+
+def category_deleted(doc: dict):
+    _apply_category(deleted=doc)
+    _announce("categories", [doc["id"]])
+
+
+async def _read_unraced(collection, ids: List[str]) -> List[dict]:
+    """Read ``ids``, again if a local write landed meanwhile, so the result is never older than the views"""
+    while True:
+        writes = _writes
+        docs = await collection.find({"id": {"$in": ids}}, {"_id": 0}).to_list(None)
+        if writes == _writes:
+            return docs
+
+
+async def _products_changed(product_ids: Optional[List[str]], at: Optional[float]):
+    """Another worker wrote these products: re-read just them and update the views"""
+    if product_ids is None:
+        await load_views()
+        return
+    docs = await _read_unraced(products_collection, product_ids)
+    current = snapshot.current().product_by_id
+    found = {doc["id"] for doc in docs}
+    deleted = [current[product_id] for product_id in product_ids if product_id not in found and product_id in current]
+    previous_category_ids = [current[doc["id"]]["category_id"] for doc in docs if doc["id"] in current]
+    _apply_products(docs, deleted, previous_category_ids)
+    _announced(at)
+
+
+async def _categories_changed(category_ids: Optional[List[str]], at: Optional[float]):
+    if category_ids is None:
+        await load_views()
+        return
+    docs = await _read_unraced(categories_collection, category_ids)
+    found = {doc["id"] for doc in docs}
+    for doc in docs:
+        _apply_category(saved=doc)
+    current = snapshot.current().category_by_id
+    for category_id in category_ids:
+        if category_id not in found and category_id in current:
+            _apply_category(deleted=current[category_id])
+    _announced(at)
+
+
+bus.subscribe("products", _products_changed)
+bus.subscribe("categories", _categories_changed)
+
+
+async def _probe() -> tuple:
+    """
+    Collection counts (from metadata) and the newest updated_at per collection
+    (one entry of its updated_at index), which change whenever documents are
+    added, removed or updated
+    """
+    async def newest(collection):
+        doc = await collection.find_one({}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)])
+        return doc and doc.get("updated_at")
+
+    return tuple(await asyncio.gather(
+        categories_collection.estimated_document_count(),
+        products_collection.estimated_document_count(),
+        newest(categories_collection),
+        newest(products_collection),
+    ))
+
+
+async def load_views() -> bool:
+    """
+    (Re)build every in-memory catalog view from MongoDB. Returns False when
+    nothing changed, or when a write raced with the read and the result was dropped.
+    """
+    global loaded_at, _loaded_probe
+    writes = _writes
+    # Probed first, so a change landing during the read shows up at the next probe
+    probe = await _probe()
+    categories, products, announced_at = await asyncio.gather(
+        categories_collection.find({}, {"_id": 0}).to_list(None),
+        products_collection.find({}, {"_id": 0}).to_list(None),
+        bus.last_change(("products", "categories")),
+    )
+    if writes != _writes:
+        return False
+    loaded_at, _loaded_probe = datetime.utcnow(), probe
+    loaded = snapshot.CatalogSnapshot(products, categories)
+    # Deletions only show in the bus log
+    catalog_changed(last_modified([*loaded.products, *loaded.categories]))
+    _announced(announced_at)
+    previous = snapshot.current()
+    if loaded.products == previous.products and loaded.categories == previous.categories:
+        return False
+    snapshot.publish(loaded)
+    search_index.rebuild(loaded.products)
+    facet_index.rebuild(loaded.products)
+    invalidate_catalog()
+    return True
+
+
+async def _stale() -> bool:
+    if FULL_RELOAD_SECONDS > 0 and (datetime.utcnow() - loaded_at).total_seconds() >= FULL_RELOAD_SECONDS:
+        return True
+    # Writes made through the API change it too: at most one extra reload per interval with writes
+    return await _probe() != _loaded_probe
+
+
+async def refresh_periodically(interval: float = SNAPSHOT_REFRESH_SECONDS):
+    """Probe every ``interval`` seconds and reload on changes; on errors keep serving the last snapshot"""
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if loaded_at is None or await _stale():
+                if await load_views():
+                    logger.info("🔄 Catalog snapshot reloaded with changes from MongoDB")
+        except Exception:
+            logger.warning("Catalog reload failed; serving the previous snapshot", exc_info=True)
@@ -0,0 +1,164 @@
+"""
+Response compression.
+``CompressionMiddleware`` negotiates brotli or gzip for compressible API
+responses, including streamed NDJSON. Cached catalog bodies are compressed
+through ``encoded_body`` instead, which keeps the compressed bytes next to the
+rendered body so each catalog change is compressed once, not per request.
+brotli is optional; without it only gzip is offered.
+"""
+from typing import Optional
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Cached bodies are compressed once per catalog change, so they can afford a higher quality
+BROTLI_QUALITY_CACHED = int(os.getenv("BROTLI_QUALITY_CACHED", "9"))
+BROTLI_QUALITY_DYNAMIC = int(os.getenv("BROTLI_QUALITY_DYNAMIC", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding in an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    candidates = [
+        (accepted.get(encoding, accepted.get("*", 0.0)), -index, encoding)
+        for index, encoding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    if encoding == "br":
+        quality = BROTLI_QUALITY_CACHED if cached else BROTLI_QUALITY_DYNAMIC
+        return brotli.compress(body, quality=quality)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def encoded_body(entry, encoding: str) -> bytes:
+    """Compressed bytes of a cached RenderedBody, computed on first use"""
+    body = entry.encoded.get(encoding)
+    if body is None:
+        body = entry.encoded[encoding] = compress(entry.body, encoding, cached=True)
+    return body
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY_DYNAMIC)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.encoding = encoding
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """Compress compressible responses that the application did not already encode"""
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = {name.lower(): value for name, value in start_message["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                raw_headers = []
+                for name, value in start_message["headers"]:
+                    name = name.lower()
+                    if name == b"content-length":
+                        continue
+                    if name == b"etag" and not value.startswith(b"W/"):
+                        # The compressed bytes are a different representation
+                        value = b"W/" + value
+                    raw_headers.append((name, value))
+                raw_headers.append((b"content-encoding", encoding.encode()))
+                raw_headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body:
+                    compressed = compress(body, encoding)
+                    raw_headers.append((b"content-length", str(len(compressed)).encode()))
+                    passthrough = True
+                    await send({**start_message, "headers": raw_headers})
+                    await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                    return
+                compressor = _StreamCompressor(encoding)
+                await send({**start_message, "headers": raw_headers})
+
+            if more_body:
+                data = compressor.chunk(body)
+                if data:
+                    await send({"type": "http.response.body", "body": data, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body), "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
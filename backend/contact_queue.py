@@ -0,0 +1,160 @@
+"""
+Write-behind queue for contact form submissions.
+Submissions are validated by the route, queued in memory and acknowledged
+immediately; a single background writer flushes them to contact_forms_collection
+with batched insert_many calls. The queue is bounded (CONTACT_QUEUE_SIZE) and
+rejects new submissions when full, and ``stop`` flushes everything still queued
+during shutdown. Queueing and flush metrics are kept in ``stats``.
+"""
+from typing import List, Optional
+import asyncio
+import json
+import logging
+import os
+import time
+
+from pymongo.errors import BulkWriteError
+
+from database import contact_forms_collection
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.getenv("CONTACT_QUEUE_SIZE", "1000"))
+BATCH_SIZE = int(os.getenv("CONTACT_BATCH_SIZE", "100"))
+# How long the writer waits for more submissions before flushing a partial batch
+FLUSH_INTERVAL = float(os.getenv("CONTACT_FLUSH_INTERVAL", "0.05"))
+SHUTDOWN_TIMEOUT = float(os.getenv("CONTACT_SHUTDOWN_TIMEOUT", "10"))
+RETRY_DELAY_MAX = 5.0
+DUPLICATE_KEY = 11000
+
+_queue: Optional[asyncio.Queue] = None
+_writer: Optional[asyncio.Task] = None
+_accepting = False
+# Set by ``stop``: the writer stops retrying failed flushes after this time
+_deadline: Optional[float] = None
+_STOP = object()
+
+stats = {
+    "depth": 0,
+    "depth_max": 0,
+    "accepted": 0,
+    "rejected": 0,
+    "flushed": 0,
+    "flushes": 0,
+    "flush_failures": 0,
+    "flush_seconds_total": 0.0,
+    "flush_seconds_max": 0.0,
+    "lost": 0,
+}
+
+
+class ContactQueueFull(Exception):
+    """Raised when CONTACT_QUEUE_SIZE submissions are already waiting to be written"""
+
+
+def submit(doc: dict):
+    """Queue a validated submission for writing; raises ContactQueueFull under backpressure"""
+    if not _accepting:
+        stats["rejected"] += 1
+        raise ContactQueueFull()
+    try:
+        _queue.put_nowait(doc)
+    except asyncio.QueueFull:
+        stats["rejected"] += 1
+        raise ContactQueueFull()
+    stats["accepted"] += 1
+    stats["depth"] = _queue.qsize()
+    stats["depth_max"] = max(stats["depth_max"], stats["depth"])
+
+
+async def _insert(batch: List[dict]):
+    try:
+        await contact_forms_collection.insert_many(batch, ordered=False)
+    except BulkWriteError as exc:
+        # A retried batch may be partly stored already; the unique id index makes that harmless
+        if any(error["code"] != DUPLICATE_KEY for error in exc.details["writeErrors"]):
+            raise
+
+
+async def _flush(batch: List[dict]) -> bool:
+    """Write ``batch``, retrying with backoff; gives up only past the shutdown deadline"""
+    delay = 0.1
+    while True:
+        started = time.perf_counter()
+        try:
+            await _insert(batch)
+        except Exception:
+            stats["flush_failures"] += 1
+            logger.warning("Could not write %d contact forms, retrying", len(batch), exc_info=True)
+            if _deadline is not None and time.monotonic() + delay > _deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_DELAY_MAX)
+            continue
+        elapsed = time.perf_counter() - started
+        stats["flushed"] += len(batch)
+        stats["flushes"] += 1
+        stats["flush_seconds_total"] += elapsed
+        stats["flush_seconds_max"] = max(stats["flush_seconds_max"], elapsed)
+        return True
+
+
+async def _next_batch() -> List:
+    """Wait for one submission, give others FLUSH_INTERVAL to join it, then take up to BATCH_SIZE"""
+    batch = [await _queue.get()]
+    if batch[0] is not _STOP and _queue.qsize() < BATCH_SIZE - 1:
+        await asyncio.sleep(FLUSH_INTERVAL)
+    while len(batch) < BATCH_SIZE and batch[-1] is not _STOP and not _queue.empty():
+        batch.append(_queue.get_nowait())
+    stats["depth"] = _queue.qsize()
+    return batch
+
+
+async def _run():
+    while True:
+        batch = await _next_batch()
+        stopping = batch[-1] is _STOP
+        docs = [doc for doc in batch if doc is not _STOP]
+        if docs and not await _flush(docs):
+            _give_up(docs)
+        if stopping:
+            return
+
+
+def _give_up(docs: List[dict]):
+    """Last resort when MongoDB stays unreachable through shutdown: keep the submissions in the log"""
+    stats["lost"] += len(docs)
+    for doc in docs:
+        logger.error("Unsaved contact form: %s", json.dumps(doc, default=str, ensure_ascii=False))
+
+
+def start():
+    global _queue, _writer, _accepting, _deadline
+    _queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _writer = asyncio.create_task(_run())
+    _accepting = True
+    _deadline = None
+
+
+async def stop():
+    """Stop accepting submissions and flush everything still queued"""
+    global _accepting, _deadline
+    if _writer is None:
+        return
+    _accepting = False
+    _deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    await _queue.put(_STOP)
+    try:
+        # A flush already in flight may take up to one more retry delay
+        await asyncio.wait_for(asyncio.shield(_writer), SHUTDOWN_TIMEOUT + RETRY_DELAY_MAX)
+    except asyncio.TimeoutError:
+        logger.error("Contact form writer did not finish flushing in time")
+        _writer.cancel()
+    leftover = []
+    while not _queue.empty():
+        item = _queue.get_nowait()
+        if item is not _STOP:
+            leftover.append(item)
+    if leftover:
+        _give_up(leftover)
+    stats["depth"] = 0
@@ -1,8 +1,12 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
 from pathlib import Path
 
+from metrics import CommandMetrics, PoolMetrics
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -10,7 +14,30 @@ load_dotenv(ROOT_DIR / '.env')
 mongo_url = os.environ['MONGO_URL']
 db_name = os.environ['DB_NAME']
 
-client = AsyncIOMotorClient(mongo_url)
+
+def _env_int(name: str):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+# Connection pool; unset timeouts keep the driver defaults
+MAX_POOL_SIZE = _env_int('MONGO_MAX_POOL_SIZE') or 100
+MIN_POOL_SIZE = _env_int('MONGO_MIN_POOL_SIZE') or 0
+POOL_OPTIONS = {
+    name: value for name, value in {
+        'maxPoolSize': MAX_POOL_SIZE,
+        'minPoolSize': MIN_POOL_SIZE,
+        'maxIdleTimeMS': _env_int('MONGO_MAX_IDLE_TIME_MS'),
+        'maxConnecting': _env_int('MONGO_MAX_CONNECTING'),
+        'waitQueueTimeoutMS': _env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+        'serverSelectionTimeoutMS': _env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS'),
+        'connectTimeoutMS': _env_int('MONGO_CONNECT_TIMEOUT_MS'),
+        'socketTimeoutMS': _env_int('MONGO_SOCKET_TIMEOUT_MS'),
+    }.items() if value is not None
+}
+
+pool_metrics = PoolMetrics()
+client = AsyncIOMotorClient(mongo_url, event_listeners=[CommandMetrics(), pool_metrics], **POOL_OPTIONS)
 db = client[db_name]
 
 # Collections
@@ -18,28 +45,42 @@ categories_collection = db['categories']
 products_collection = db['products']
 contact_forms_collection = db['contact_forms']
 admin_users_collection = db['admin_users']
+# Cross-worker invalidation log (see invalidation_bus.py)
+invalidations_collection = db['invalidations']
 
-async def init_db():
-    """Initialize database with indexes and default data"""
-    # Create indexes
-    await products_collection.create_index("category_id")
-    await products_collection.create_index("is_active")
-    await categories_collection.create_index("slug", unique=True)
-    await admin_users_collection.create_index("username", unique=True)
-    await admin_users_collection.create_index("email", unique=True)
-    
-    # Check if default admin exists
-    admin_exists = await admin_users_collection.find_one({"username": "admin"})
+async def _ensure_default_admin():
+    admin_exists = await admin_users_collection.find_one({"username": "admin"}, {"_id": 1})
     if not admin_exists:
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        from hashing import hash_password
         
         default_admin = {
             "id": "admin-default",
             "username": "admin",
             "email": "admin@goldvakum.com",
-            "hashed_password": pwd_context.hash("admin123"),  # Default password
+            "hashed_password": await hash_password("admin123"),  # Default password
             "is_active": True,
         }
-        await admin_users_collection.insert_one(default_admin)
-        print("✅ Default admin created: username=admin, password=admin123")
+        # Keyed on the unique username, so workers booting together create it once
+        try:
+            result = await admin_users_collection.update_one(
+                {"username": "admin"}, {"$setOnInsert": default_admin}, upsert=True
+            )
+        except DuplicateKeyError:
+            # Another worker's upsert won the race
+            return
+        if result.upserted_id is not None:
+            print("✅ Default admin created: username=admin, password=admin123")
+
+async def init_db():
+    """Initialize database with indexes and default data"""
+    # Reconcile indexes with the registry in indexes.py, skipped when it is unchanged.
+    # Awaited first: the unique username index is what keeps the default admin single
+    from indexes import ensure_indexes
+    if not await ensure_indexes():
+        print("✅ Indexes match the registry fingerprint; skipped reconciliation")
+    await _ensure_default_admin()
+
+async def warm_up_pool():
+    """Open MIN_POOL_SIZE connections now rather than on the first requests"""
+    # Concurrent pings each hold their own connection while in flight
+    await asyncio.gather(*(client.admin.command('ping') for _ in range(max(MIN_POOL_SIZE, 1))))
@@ -0,0 +1,137 @@
+"""
+Spec facets for catalog browsing.
+Keeps, in memory, which active products carry each ``specs`` key/value pair
+and a running count per category, updated on every product write (see
+catalog_events.py). Facet pages are answered from these sets instead of an
+aggregation over products_collection.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi import HTTPException
+
+# Facet key -> selected values; values of one key are OR'ed, keys are AND'ed
+SpecFilter = Dict[str, List[str]]
+
+
+def parse_spec_filter(specs: Optional[List[str]]) -> SpecFilter:
+    """Parse repeated ``spec=key:value`` query parameters"""
+    selected: SpecFilter = {}
+    for item in specs or []:
+        key, sep, value = item.partition(":")
+        key, value = key.strip(), value.strip()
+        if not sep or not key or not value or key.startswith("$") or "." in key:
+            raise HTTPException(status_code=400, detail=f"Invalid spec filter: {item}")
+        values = selected.setdefault(key, [])
+        if value not in values:
+            values.append(value)
+    return {key: sorted(values) for key, values in sorted(selected.items())}
+
+
+def _spec_pairs(doc: dict):
+    for key, value in (doc.get("specs") or {}).items():
+        value = str(value).strip()
+        if value:
+            yield key, value
+
+
+class FacetIndex:
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._docs: Dict[str, dict] = {}
+        # (key, value) -> product ids, and category -> product ids, active products only
+        self._by_value: Dict[tuple, Set[str]] = defaultdict(set)
+        self._by_category: Dict[str, Set[str]] = defaultdict(set)
+        # Precomputed unfiltered counts: category (None = all) -> key -> value -> count
+        self._counts: Dict[Optional[str], Dict[str, Dict[str, int]]] = defaultdict(lambda: defaultdict(dict))
+
+    def __len__(self):
+        return len(self._docs)
+
+    def rebuild(self, docs: Iterable[dict]):
+        self._reset()
+        for doc in docs:
+            self.add(doc)
+
+    def _count(self, category_id: str, key: str, value: str, delta: int):
+        for scope in (None, category_id):
+            by_value = self._counts[scope][key]
+            count = by_value.get(value, 0) + delta
+            if count:
+                by_value[value] = count
+            else:
+                del by_value[value]
+                if not by_value:
+                    del self._counts[scope][key]
+
+    def add(self, doc: dict):
+        """Index (or re-index) one product document"""
+        product_id = doc["id"]
+        self.remove(product_id)
+        if not doc.get("is_active", True):
+            return
+        entry = {"category_id": doc["category_id"], "specs": list(_spec_pairs(doc))}
+        self._docs[product_id] = entry
+        self._by_category[entry["category_id"]].add(product_id)
+        for key, value in entry["specs"]:
+            self._by_value[(key, value)].add(product_id)
+            self._count(entry["category_id"], key, value, 1)
+
+    def remove(self, product_id: str):
+        entry = self._docs.pop(product_id, None)
+        if entry is None:
+            return
+        category_ids = self._by_category[entry["category_id"]]
+        category_ids.discard(product_id)
+        if not category_ids:
+            del self._by_category[entry["category_id"]]
+        for key, value in entry["specs"]:
+            ids = self._by_value[(key, value)]
+            ids.discard(product_id)
+            if not ids:
+                del self._by_value[(key, value)]
+            self._count(entry["category_id"], key, value, -1)
+
+    def _matching(self, category_id: Optional[str], selected: SpecFilter, skip_key: Optional[str] = None) -> Set[str]:
+        ids = set(self._by_category.get(category_id, ())) if category_id else set(self._docs)
+        for key, values in selected.items():
+            if key == skip_key:
+                continue
+            union = set()
+            for value in values:
+                union |= self._by_value.get((key, value), set())
+            ids &= union
+            if not ids:
+                break
+        return ids
+
+    def facets(self, category_id: Optional[str] = None, selected: Optional[SpecFilter] = None):
+        """
+        (total, counts) for active products in ``category_id`` matching ``selected``.
+        Counts for a key ignore that key's own selection, so the other values
+        of a selected facet still show how many products choosing them would give.
+        """
+        selected = selected or {}
+        precomputed = self._counts.get(category_id or None, {})
+        if not selected:
+            total = len(self._by_category.get(category_id, ())) if category_id else len(self._docs)
+            return total, {key: dict(sorted(by_value.items())) for key, by_value in sorted(precomputed.items())}
+
+        counts = {}
+        for key in sorted(set(precomputed) | set(selected)):
+            candidates = self._matching(category_id, selected, skip_key=key)
+            by_value = {}
+            for value in precomputed.get(key, {}):
+                count = len(candidates & self._by_value[(key, value)])
+                if count or value in selected.get(key, ()):
+                    by_value[value] = count
+            for value in selected.get(key, ()):
+                by_value.setdefault(value, 0)
+            if by_value:
+                counts[key] = dict(sorted(by_value.items()))
+        return len(self._matching(category_id, selected)), counts
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,75 @@
+"""
+Password hashing off the event loop.
+bcrypt deliberately burns 100-300 ms of CPU per call, which would stall every
+other request on the worker if it ran inline. Hashes are computed in a small
+dedicated thread pool (bcrypt releases the GIL) with a cap on how many calls
+may queue up, and queueing metrics are kept in ``stats``.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import os
+import time
+
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+
+@lru_cache(maxsize=None)
+def crypt_context():
+    # passlib is only needed for logins and seeding, so it is not imported at startup
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_slots = asyncio.Semaphore(HASH_WORKERS)
+
+stats = {
+    "in_flight": 0,
+    "queued": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+
+
+class HashingQueueFull(Exception):
+    """Raised when more password checks are waiting than PASSWORD_HASH_QUEUE_LIMIT allows"""
+
+
+async def _run(fn, *args):
+    if stats["queued"] >= HASH_QUEUE_LIMIT:
+        stats["rejected"] += 1
+        raise HashingQueueFull()
+
+    queued_at = time.perf_counter()
+    stats["queued"] += 1
+    try:
+        await _slots.acquire()
+    finally:
+        stats["queued"] -= 1
+    waited = time.perf_counter() - queued_at
+    stats["wait_seconds_total"] += waited
+    stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+
+    stats["in_flight"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        stats["in_flight"] -= 1
+        stats["completed"] += 1
+        _slots.release()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(crypt_context().verify, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(crypt_context().hash, password)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+"""
+Conditional GET support for catalog reads.
+Rendered bodies are cached together with a strong ETag (a hash of the body)
+and a Last-Modified timestamp, so revalidation requests are answered with a
+304 from a header comparison, without touching MongoDB or serializing.
+Compressed copies of each body are kept on the same entry, so they are
+dropped together with it when the catalog changes.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+from hashlib import blake2b
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from serialization import json_response
+from compression import MIN_SIZE, SUPPORTED_ENCODINGS, encoded_body, negotiate
+
+
+class RenderedBody(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+    headers: Dict[str, str]
+    # Content-Encoding -> compressed body, filled on first request for each encoding
+    encoded: Dict[str, bytes]
+
+
+def rendered(body: bytes, last_modified: Optional[datetime] = None, headers: Dict[str, str] = None) -> RenderedBody:
+    etag = '"' + blake2b(body, digest_size=16).hexdigest() + '"'
+    return RenderedBody(body, etag, last_modified, headers or {}, {})
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong ETags must differ between the identity and compressed representations"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def last_modified(docs: Iterable[dict], floor: Optional[datetime] = None) -> Optional[datetime]:
+    """Newest updated_at (or created_at) of the documents, never older than ``floor``"""
+    stamps = [doc.get("updated_at") or doc.get("created_at") for doc in docs]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    if floor is not None:
+        stamps.append(floor)
+    return max(stamps, default=None)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands back naive datetimes that are already UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(request: Request, entry: RenderedBody) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent (RFC 9110 13.2.2)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = {entry.etag} | {encoded_etag(entry.etag, encoding) for encoding in SUPPORTED_ENCODINGS}
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses the weak comparison function
+        return any(tag.removeprefix("W/") in current for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and entry.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _as_utc(entry.last_modified) <= since
+    return False
+
+
+def conditional_response(request: Request, entry: RenderedBody, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Send the cached body (compressed if negotiated), or an empty 304 if the client already has it.
+    ``headers`` are specific to this request (built from its URL) and never cached with the body.
+    """
+    extra = headers or {}
+    encoding = None
+    if len(entry.body) >= MIN_SIZE:
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+    headers = {
+        **entry.headers,
+        **extra,
+        "ETag": encoded_etag(entry.etag, encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if entry.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(entry.last_modified), usegmt=True)
+    if is_not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return json_response(entry.body, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return json_response(encoded_body(entry, encoding), headers=headers)
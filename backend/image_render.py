@@ -0,0 +1,41 @@
+"""
+Image variant rendering, run in the image process pool (see images.py).
+Spawned workers import this module to unpickle the task, so it must not
+import the application: no database client, no catalog views.
+"""
+from pathlib import Path
+from typing import Dict
+import os
+
+QUALITY = {"webp": 80, "avif": 60}
+
+
+def render_variants(source: str, widths: tuple, formats: tuple) -> Dict[str, Dict[str, str]]:
+    """Write resized variants of ``source`` next to it; runs in a worker process"""
+    from PIL import Image, ImageOps
+
+    Image.init()
+    source_path = Path(source)
+    formats = [fmt for fmt in formats if fmt.upper() in Image.SAVE]
+    variants: Dict[str, Dict[str, str]] = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for width in sorted(widths):
+            # Never upscale; the smallest width is always produced so thumbnails exist
+            if width > image.width and width != min(widths):
+                continue
+            resized = None
+            for fmt in formats:
+                filename = f"{source_path.stem}_{width}w.{fmt}"
+                target = source_path.with_name(filename)
+                if not target.exists():
+                    if resized is None:
+                        resized = image.copy()
+                        resized.thumbnail((width, width * 4), Image.LANCZOS)
+                    tmp = target.with_name(f".{filename}.tmp")
+                    resized.save(tmp, format=fmt.upper(), quality=QUALITY.get(fmt, 80))
+                    os.replace(tmp, target)
+                variants.setdefault(str(width), {})[fmt] = filename
+    return variants
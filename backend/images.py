@@ -0,0 +1,105 @@
+"""
+Background image derivatives.
+After an upload, resized WebP/AVIF variants are rendered in a process pool
+off the request path and recorded on the product under ``image_variants``:
+    {<stored file stem>: {"<width>": {"<format>": "/api/uploads/<file>"}}}
+Variants are named after the content hash of their source, so re-uploading
+an image reuses the files already on disk.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+
+from pymongo import ReturnDocument
+
+from database import products_collection
+import catalog_events
+from image_render import render_variants
+from uploads import UPLOAD_DIR, UPLOADS_URL, upload_url
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(","))
+VARIANT_FORMATS = tuple(os.getenv("IMAGE_VARIANT_FORMATS", "avif,webp").split(","))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process runs threads (Motor, hashing) that must not be forked.
+        # Workers only import image_render, not the app (database client, catalog views)
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def local_upload(image_url: str) -> Optional[Path]:
+    """Path of an image stored in UPLOAD_DIR, or None for external URLs"""
+    prefix = UPLOADS_URL + "/"
+    if not image_url.startswith(prefix):
+        return None
+    path = UPLOAD_DIR / image_url[len(prefix):]
+    return path if path.parent == UPLOAD_DIR and path.exists() else None
+
+
+async def generate_variants(product_id: str, image_url: str):
+    """Render variants for one product image and record them on the product"""
+    source = local_upload(image_url)
+    if source is None:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        files = await loop.run_in_executor(_executor(), render_variants, str(source), VARIANT_WIDTHS, VARIANT_FORMATS)
+    except ImportError:
+        logger.warning("Pillow is not installed; skipping image variants")
+        return
+    except Exception:
+        logger.exception("Could not render variants for %s", image_url)
+        return
+
+    variants = {width: {fmt: upload_url(name) for fmt, name in by_format.items()} for width, by_format in files.items()}
+    result = await products_collection.find_one_and_update(
+        {"id": product_id, "images": image_url},
+        {"$set": {f"image_variants.{source.stem}": variants, "updated_at": datetime.utcnow()}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if result:
+        catalog_events.product_saved(result)
+
+
+def pick_variant(product: dict, image_url: str, width: Optional[int], accept: str = "", fmt: Optional[str] = None) -> str:
+    """URL of the variant best matching ``width``/format for an image, falling back to the original"""
+    source = local_upload(image_url)
+    if source is None:
+        return image_url
+    by_width = product.get("image_variants", {}).get(source.stem)
+    if not by_width:
+        return image_url
+
+    widths = sorted(int(w) for w in by_width)
+    chosen = widths[-1]
+    if width is not None:
+        chosen = next((w for w in widths if w >= width), widths[-1])
+    by_format = by_width[str(chosen)]
+
+    if fmt is not None:
+        return by_format.get(fmt, image_url)
+    for candidate in VARIANT_FORMATS:
+        if candidate in by_format and f"image/{candidate}" in accept:
+            return by_format[candidate]
+    if "webp" in by_format and (not accept or "*/*" in accept):
+        return by_format["webp"]
+    return image_url
+
+
+def shutdown():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,255 @@
+"""
+Declarative index registry.
+Every query a route runs must be served by one of the indexes below, apart
+from the few that read a whole collection by design (WHOLE_COLLECTION_READS).
+``ensure_indexes`` reconciles the database with the registry at startup (a
+no-op when the registry is unchanged since the last run, see ``fingerprint``)
+and ``check_query_plans`` runs ``explain()`` on every route's query shape.
+
+Run from the backend directory to verify query plans against the configured
+database (exits non-zero if any route query is a collection scan); this
+always reconciles, so it also repairs indexes changed by hand:
+    python indexes.py
+"""
+import asyncio
+import hashlib
+import json
+import sys
+from datetime import datetime
+from typing import NamedTuple, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from database import db
+from product_io import spec_keys_pipeline
+
+
+# Holds the fingerprint of the last registry that was fully applied and the
+# names of the indexes created from it, per collection
+META_COLLECTION = "meta"
+FINGERPRINT_ID = "indexes"
+# Server error code when dropping an index that does not exist
+INDEX_NOT_FOUND = 27
+
+
+class IndexSpec(NamedTuple):
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+
+    @property
+    def name(self) -> str:
+        # Same naming scheme as the server default, so existing indexes are recognized
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+INDEXES = {
+    "categories": [
+        IndexSpec((("id", ASCENDING),), unique=True),
+        IndexSpec((("slug", ASCENDING),), unique=True),
+        # The catalog reload probe reads the newest updated_at (catalog_events.py)
+        IndexSpec((("updated_at", DESCENDING),)),
+    ],
+    "products": [
+        IndexSpec((("id", ASCENDING),), unique=True),
+        # Public listings are served from the catalog snapshot (snapshot.py);
+        # the export streams in (created_at, id) order, optionally for one category
+        IndexSpec((("category_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING))),
+        IndexSpec((("created_at", ASCENDING), ("id", ASCENDING))),
+        # The catalog reload probe reads the newest updated_at (catalog_events.py)
+        IndexSpec((("updated_at", DESCENDING),)),
+    ],
+    "contact_forms": [
+        IndexSpec((("id", ASCENDING),), unique=True),
+        # The inbox lists newest first, optionally only unread messages; the
+        # unread badge counts over the is_read prefix
+        IndexSpec((("is_read", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING))),
+        IndexSpec((("created_at", DESCENDING), ("id", DESCENDING))),
+    ],
+    "admin_users": [
+        IndexSpec((("id", ASCENDING),), unique=True),
+        IndexSpec((("username", ASCENDING),), unique=True),
+        IndexSpec((("email", ASCENDING),), unique=True),
+    ],
+}
+
+_SAMPLE_CURSOR_DESC = {"$or": [
+    {"created_at": {"$lt": datetime(2024, 1, 1)}},
+    {"created_at": datetime(2024, 1, 1), "id": {"$lt": "sample"}},
+]}
+_PRODUCT_ORDER = [("created_at", ASCENDING), ("id", ASCENDING)]
+_CONTACT_ORDER = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+# (route, collection, filter, sort) for every query shape the routes issue; a
+# list in place of the filter is an aggregation pipeline
+ROUTE_QUERIES = [
+    ("export_products", "products", {}, _PRODUCT_ORDER),
+    ("export_products?category_id", "products", {"category_id": "sample"}, _PRODUCT_ORDER),
+    ("export_products?category_id:spec_keys", "products", spec_keys_pipeline({"category_id": "sample"}), None),
+    ("catalog_probe", "products", {}, [("updated_at", DESCENDING)]),
+    ("catalog_probe", "categories", {}, [("updated_at", DESCENDING)]),
+    ("_read_unraced", "products", {"id": {"$in": ["sample"]}}, None),
+    ("_read_unraced", "categories", {"id": {"$in": ["sample"]}}, None),
+    ("create_product", "categories", {"id": "sample"}, None),
+    ("import_products", "products", {"id": {"$in": ["sample"]}}, None),
+    ("import_products", "categories", {"$or": [{"id": {"$in": ["sample"]}}, {"slug": {"$in": ["sample"]}}]}, None),
+    ("update_product", "products", {"id": "sample"}, None),
+    ("delete_product", "products", {"id": "sample"}, None),
+    ("upload_product_image", "products", {"id": "sample"}, None),
+    ("delete_product_image", "products", {"id": "sample"}, None),
+    ("generate_variants", "products", {"id": "sample", "images": "sample"}, None),
+    ("create_category", "categories", {"slug": "sample"}, None),
+    ("update_category", "categories", {"id": "sample"}, None),
+    ("delete_category", "categories", {"id": "sample"}, None),
+    ("get_contact_forms", "contact_forms", {}, _CONTACT_ORDER),
+    ("get_contact_forms?is_read", "contact_forms", {"is_read": False}, _CONTACT_ORDER),
+    ("get_contact_forms?after", "contact_forms", dict(_SAMPLE_CURSOR_DESC), _CONTACT_ORDER),
+    ("get_contact_form_counts", "contact_forms", {"is_read": False}, None),
+    ("get_contact_form_summaries", "contact_forms", {}, _CONTACT_ORDER),
+    ("get_contact_form_summaries?is_read", "contact_forms", {"is_read": False}, _CONTACT_ORDER),
+    ("mark_contact_read", "contact_forms", {"id": "sample"}, None),
+    ("mark_contacts_read", "contact_forms", {"id": {"$in": ["sample"]}, "is_read": False}, None),
+    ("delete_contact_form", "contact_forms", {"id": "sample"}, None),
+    ("delete_contact_forms", "contact_forms", {"id": {"$in": ["sample"]}}, None),
+    ("get_current_admin", "admin_users", {"username": "sample"}, None),
+    ("authenticate_admin", "admin_users", {"username": "sample"}, None),
+    ("set_admin_active", "admin_users", {"username": "sample"}, None),
+    ("delete_admin", "admin_users", {"username": "sample"}, None),
+]
+
+# (route, collection) of reads that visit every document by design, so no index
+# could serve them better; check_query_plans lists them without explaining them
+WHOLE_COLLECTION_READS = [
+    ("load_views", "categories"),
+    ("load_views", "products"),
+    # The CSV header of a full export needs the spec keys of every product
+    ("export_products:spec_keys", "products"),
+]
+
+
+def fingerprint() -> str:
+    """Hash of the registry; stored after a successful reconcile so later boots can skip it"""
+    canonical = {name: sorted([list(spec.keys), spec.unique] for spec in specs) for name, specs in INDEXES.items()}
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+async def _reconcile(collection_name: str, specs, managed) -> bool:
+    """
+    Bring one collection's indexes in line with the registry; False if an index
+    could not be dropped or created. Only indexes in ``managed`` (created from an
+    earlier registry) or clashing with a registered name are dropped; any other
+    index was added by hand and is left alone.
+    """
+    collection = db[collection_name]
+    existing = await collection.index_information()
+    wanted = {spec.name: spec for spec in specs}
+
+    stale = []
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+        spec = wanted.get(name)
+        keys = tuple((field, int(direction)) for field, direction in info["key"])
+        if spec is not None and keys == spec.keys and info.get("unique", False) == spec.unique:
+            del wanted[name]
+        elif spec is not None or name in managed:
+            stale.append(name)
+        else:
+            print(f"ℹ️  Leaving index {collection_name}.{name}, which the registry does not declare")
+
+    async def drop(name) -> bool:
+        try:
+            await collection.drop_index(name)
+        except OperationFailure as exc:
+            # Workers booting together all reconcile; another one dropped it first
+            if exc.code != INDEX_NOT_FOUND:
+                print(f"❌ Could not drop index {collection_name}.{name}: {exc}")
+                return False
+        print(f"🗑️  Dropped index {collection_name}.{name}")
+        return True
+
+    async def create(name, spec) -> bool:
+        try:
+            await collection.create_index(list(spec.keys), name=name, unique=spec.unique)
+        except OperationFailure as exc:
+            print(f"❌ Could not create index {collection_name}.{name}: {exc}")
+            return False
+        print(f"✅ Created index {collection_name}.{name}")
+        return True
+
+    # Dropped first: a changed index is recreated under the same name
+    if not all(await asyncio.gather(*(drop(name) for name in stale))):
+        return False
+    return all(await asyncio.gather(*(create(name, spec) for name, spec in wanted.items())))
+
+
+async def ensure_indexes(force: bool = False):
+    """
+    Create registered indexes that are missing and drop the ones an earlier registry created
+    that it no longer declares. Skipped when the registry's fingerprint matches the one stored
+    by the last successful run, unless ``force`` is set; collections are reconciled concurrently.
+    """
+    current = fingerprint()
+    stored = await db[META_COLLECTION].find_one({"_id": FINGERPRINT_ID}) or {}
+    if not force and stored.get("fingerprint") == current:
+        return False
+    managed = stored.get("managed", {})
+    results = await asyncio.gather(*(
+        _reconcile(name, specs, set(managed.get(name, ()))) for name, specs in INDEXES.items()
+    ))
+    update = {"managed": {name: [spec.name for spec in specs] for name, specs in INDEXES.items()}}
+    if all(results):
+        update.update(fingerprint=current, updated_at=datetime.utcnow())
+    else:
+        # Keep track of stale indexes that are still there, to drop them next time
+        for name, names in managed.items():
+            update["managed"][name] = sorted(set(update["managed"].get(name, ())) | set(names))
+    await db[META_COLLECTION].update_one({"_id": FINGERPRINT_ID}, {"$set": update}, upsert=True)
+    return True
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            yield from _stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def check_query_plans() -> list:
+    """Explain every registered route query; return the routes whose winning plan is a COLLSCAN"""
+    failures = []
+    for route, collection_name, query, sort in ROUTE_QUERIES:
+        if isinstance(query, list):
+            explanation = await db.command("aggregate", collection_name, pipeline=query, explain=True)
+            if "queryPlanner" not in explanation:
+                # The pipeline was not pushed down whole; the query runs in its first stage
+                explanation = explanation["stages"][0]["$cursor"]
+        else:
+            cursor = db[collection_name].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            explanation = await cursor.explain()
+        stages = set(_stages(explanation["queryPlanner"]["winningPlan"]))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"{'❌' if status == 'COLLSCAN' else '✅'} {route:45} {collection_name:14} {', '.join(sorted(s for s in stages if s))}")
+        if status == "COLLSCAN":
+            failures.append(route)
+    for route, collection_name in WHOLE_COLLECTION_READS:
+        print(f"ℹ️  {route:45} {collection_name:14} reads the whole collection by design")
+    return failures
+
+
+async def main():
+    await ensure_indexes(force=True)
+    failures = await check_query_plans()
+    if failures:
+        print(f"\n❌ {len(failures)} route queries scan the whole collection: {', '.join(failures)}")
+        return 1
+    print("\n✅ Every route query is served by an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
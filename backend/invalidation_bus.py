@@ -0,0 +1,182 @@
+"""
+Cross-worker invalidation bus.
+Each uvicorn worker keeps its own in-memory views (catalog snapshot, caches,
+admin principals). When one worker writes, it announces what changed by
+bumping a single version document in the ``invalidations`` collection:
+
+    {"_id": "catalog", "version": 42, "changes": [{"kind", "keys", "worker", "at"}, ...]}
+
+Every update increments ``version`` by one and appends one entry (the last
+INVALIDATION_LOG_SIZE are kept), so the entry for version v is found by
+counting back from the newest. Other workers apply the entries newer than the
+version they have seen, re-reading only the changed documents. They are woken
+by a change stream on the version document when the deployment supports one
+(replica sets), and otherwise poll its version every INVALIDATION_POLL_INTERVAL
+seconds. A worker that falls further behind than the log reaches rebuilds
+everything instead.
+"""
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from database import invalidations_collection
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", "0.2"))
+LOG_SIZE = int(os.getenv("INVALIDATION_LOG_SIZE", "256"))
+USE_CHANGE_STREAMS = os.getenv("INVALIDATION_CHANGE_STREAMS", "true").lower() in ("1", "true", "yes")
+ANNOUNCE_TIMEOUT = 5.0
+DOC_ID = "catalog"
+
+# Called with the changed keys (None when everything of that kind may have changed)
+# and the time of the change as announced (None on a rebuild)
+Handler = Callable[[Optional[List[str]], Optional[float]], Awaitable[None]]
+
+
+class InvalidationBus:
+    def __init__(self, collection=None, worker: Optional[str] = None):
+        self.collection = collection if collection is not None else invalidations_collection
+        self.worker = worker or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.version = 0
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._pending = set()
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {
+            "mode": None,
+            "version": 0,
+            "announced": 0,
+            "announce_failures": 0,
+            "applied": 0,
+            "resyncs": 0,
+            "propagation_seconds_last": 0.0,
+            "propagation_seconds_max": 0.0,
+            "propagation_seconds_total": 0.0,
+        }
+
+    def subscribe(self, kind: str, handler: Handler):
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def announce(self, kind: str, keys: Optional[List[str]] = None, at: Optional[float] = None):
+        """
+        Tell the other workers that ``keys`` of ``kind`` changed at ``at`` (a
+        timestamp, now if omitted); returns without waiting
+        """
+        try:
+            task = asyncio.get_running_loop().create_task(self._announce(kind, keys, at or time.time()))
+        except RuntimeError:
+            # No event loop (scripts); the other workers catch up at their periodic reload
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _announce(self, kind: str, keys: Optional[List[str]], at: float):
+        entry = {"kind": kind, "keys": keys, "worker": self.worker, "at": at}
+        try:
+            await self.collection.update_one(
+                {"_id": DOC_ID},
+                {"$inc": {"version": 1}, "$push": {"changes": {"$each": [entry], "$slice": -LOG_SIZE}}},
+                upsert=True,
+            )
+        except Exception:
+            self.stats["announce_failures"] += 1
+            logger.warning("Could not announce %s change to other workers", kind, exc_info=True)
+            return
+        self.stats["announced"] += 1
+
+    async def _latest_version(self) -> int:
+        doc = await self.collection.find_one({"_id": DOC_ID}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    async def last_change(self, kinds: Iterable[str]) -> Optional[float]:
+        """When the newest change of one of ``kinds`` still in the log was announced"""
+        doc = await self.collection.find_one({"_id": DOC_ID}, {"changes": 1}) or {}
+        kinds = set(kinds)
+        return max((entry["at"] for entry in doc.get("changes", ()) if entry["kind"] in kinds), default=None)
+
+    async def _dispatch(self, kind: str, keys: Optional[List[str]], at: Optional[float] = None):
+        for handler in self._handlers.get(kind, ()):
+            await handler(keys, at)
+
+    async def _resync(self):
+        self.stats["resyncs"] += 1
+        for kind in self._handlers:
+            await self._dispatch(kind, None)
+
+    async def sync(self):
+        """Apply every change announced by other workers since the last sync"""
+        if await self._latest_version() == self.version:
+            return
+        doc = await self.collection.find_one({"_id": DOC_ID}) or {"version": 0, "changes": []}
+        latest, changes = doc["version"], doc["changes"]
+        first = latest - len(changes) + 1
+        if latest < self.version or self.version + 1 < first:
+            # The log was reset or no longer reaches back to our version
+            logger.warning("Invalidation log skipped from version %d to %d; rebuilding", self.version, latest)
+            await self._resync()
+        else:
+            for offset, entry in enumerate(changes):
+                if first + offset <= self.version or entry["worker"] == self.worker:
+                    continue
+                await self._dispatch(entry["kind"], entry["keys"], entry["at"])
+                lag = max(0.0, time.time() - entry["at"])
+                self.stats["applied"] += 1
+                self.stats["propagation_seconds_last"] = lag
+                self.stats["propagation_seconds_total"] += lag
+                self.stats["propagation_seconds_max"] = max(self.stats["propagation_seconds_max"], lag)
+        self.version = self.stats["version"] = latest
+
+    async def _watch(self) -> bool:
+        """Sync on every change to the version document; False if change streams are unsupported"""
+        try:
+            stream = self.collection.watch([{"$match": {"documentKey._id": DOC_ID}}])
+            # The stream is opened lazily; standalone servers (no replica set) fail here
+            await stream.try_next()
+        except Exception as exc:
+            logger.info("Change streams unavailable (%s); polling for invalidations", exc)
+            return False
+        async with stream:
+            self.stats["mode"] = "change_stream"
+            # Changes made before the stream opened
+            await self.sync()
+            async for _ in stream:
+                await self.sync()
+        return True
+
+    async def _poll(self):
+        self.stats["mode"] = "polling"
+        while True:
+            await self.sync()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _listen(self):
+        streams = USE_CHANGE_STREAMS
+        while True:
+            try:
+                if streams and not await self._watch():
+                    streams = False
+                if not streams:
+                    await self._poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Invalidation listener failed; restarting", exc_info=True)
+                await asyncio.sleep(POLL_INTERVAL)
+
+    async def start(self):
+        """Start listening from the current version; call before building the views it invalidates"""
+        self.version = self.stats["version"] = await self._latest_version()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pending:
+            await asyncio.wait(self._pending, timeout=ANNOUNCE_TIMEOUT)
+
+
+bus = InvalidationBus()
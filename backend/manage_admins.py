@@ -0,0 +1,42 @@
+"""
+Deactivate, reactivate or delete admin users. Every admin has the same
+rights, so this is not exposed over HTTP, where one admin could lock out all
+the others. Changes go through auth.py, so running workers drop the user's
+cached principal right away instead of after ADMIN_PRINCIPAL_TTL.
+
+Run from the backend directory:
+    python manage_admins.py deactivate <username>
+    python manage_admins.py activate <username>
+    python manage_admins.py delete <username>
+"""
+import argparse
+import asyncio
+import sys
+
+from auth import delete_admin, set_admin_active
+from invalidation_bus import bus
+
+
+async def main(args) -> int:
+    if args.action == "delete":
+        found = await delete_admin(args.username)
+    else:
+        found = await set_admin_active(args.username, args.action == "activate")
+    # Wait for the announcement to the running workers
+    await bus.stop()
+    if not found:
+        print(f"❌ No admin user named {args.username!r}")
+        return 1
+    print(f"✅ {args.action.capitalize()}d admin {args.username!r}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Manage admin users")
+    parser.add_argument("action", choices=("deactivate", "activate", "delete"))
+    parser.add_argument("username")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
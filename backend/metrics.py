@@ -0,0 +1,286 @@
+"""
+Prometheus metrics, served at /metrics.
+- ``MetricsMiddleware`` records request latency per method, route template and
+  status, and the number of requests in flight.
+- ``CommandMetrics`` and ``PoolMetrics`` are PyMongo event listeners registered
+  on the Motor client in database.py: command latency per collection and
+  command, and how long requests wait to check a connection out of the pool.
+- At scrape time, the in-process caches report hits and misses, and the stats
+  dicts of the background workers (hashing, contact queue, invalidation bus)
+  are exported: running totals as counters (``*_total``), levels as gauges.
+/metrics is not public: scrapers send METRICS_TOKEN as a bearer token, and
+without a token every scrape is refused. Setting METRICS_ALLOWED_NETWORKS
+(comma-separated CIDRs) instead answers clients from those networks without
+a token. The address checked is the TCP peer, which behind a reverse proxy is
+the proxy itself; every public request then comes from the proxy's address,
+so only use it when the proxy cannot reach /metrics or rewrites the client
+address (uvicorn --proxy-headers with --forwarded-allow-ips).
+Hot-path cost is a dict lookup and a histogram observation per request or
+command; benchmarks/bench_metrics.py measures it.
+"""
+from typing import Dict, Tuple
+import hmac
+import ipaddress
+import os
+import threading
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+from starlette.responses import PlainTextResponse, Response
+
+import timing
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+ALLOWED_NETWORKS = tuple(
+    ipaddress.ip_network(network.strip())
+    for network in os.getenv("METRICS_ALLOWED_NETWORKS", "").split(",")
+    if network.strip()
+)
+
+# Stats keys that only ever grow; every other key is a level and stays a gauge
+COUNTER_STATS = {
+    "password_hashing": ("completed", "rejected", "wait_seconds_total"),
+    "contact_queue": ("accepted", "rejected", "flushed", "flushes", "flush_failures", "flush_seconds_total", "lost"),
+    "invalidation": ("announced", "announce_failures", "applied", "resyncs", "propagation_seconds_total"),
+}
+
+# Snapshot reads answer in well under a millisecond, so the buckets start low
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body byte is sent",
+    ("method", "route", "status"), buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled")
+COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency as reported by the driver",
+    ("collection", "command"), buckets=LATENCY_BUCKETS,
+)
+COMMAND_FAILURES = Counter("mongodb_command_failures_total", "Failed MongoDB commands", ("collection", "command"))
+CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", buckets=LATENCY_BUCKETS,
+)
+CHECKOUT_FAILURES = Counter("mongodb_pool_checkout_failures_total", "Connection checkouts that failed", ("reason",))
+CONNECTIONS_CHECKED_OUT = Gauge("mongodb_pool_connections_checked_out", "Pooled connections currently in use")
+CONNECTIONS_OPEN = Gauge("mongodb_pool_connections_open", "Pooled connections currently open")
+CHECKOUTS_WAITING = Gauge("mongodb_pool_checkouts_waiting", "Operations waiting for a pooled connection")
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    if "endpoint" in scope:
+        # A mounted app, e.g. /api/uploads
+        return scope.get("root_path") or "mounted"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Time every HTTP request from the first byte received to the last byte sent"""
+
+    def __init__(self, app):
+        self.app = app
+        self._durations: Dict[Tuple[str, str, str], object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            key = (scope["method"], _route_label(scope), str(status))
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = REQUEST_DURATION.labels(*key)
+            duration.observe(time.perf_counter() - started)
+
+
+def _collection(event) -> str:
+    # The command's first field names the collection (getMore names it separately)
+    target = event.command.get(event.command_name)
+    if event.command_name == "getMore":
+        target = event.command.get("collection")
+    return target if isinstance(target, str) else ""
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Command latency per collection; events arrive on the driver's threads"""
+
+    def __init__(self):
+        self._started: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        self._started[(event.connection_id, event.request_id)] = _collection(event)
+
+    def succeeded(self, event):
+        collection = self._started.pop((event.connection_id, event.request_id), "")
+        COMMAND_DURATION.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        # Motor runs the driver with the request's context, so this lands in its Server-Timing
+        timing.add("db", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._started.pop((event.connection_id, event.request_id), "")
+        COMMAND_DURATION.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        timing.add("db", event.duration_micros / 1e6)
+        COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Checkout wait and pool usage per server. Counts are kept here as well as
+    in the gauges, so the readiness check (routes/health.py) can read them.
+    A checkout starts and ends on the same thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # address -> {"open", "checked_out", "waiting"}
+        self.servers: Dict[tuple, Dict[str, int]] = {}
+        # thread id -> when its pending checkout started
+        self._waiting_since: Dict[int, float] = {}
+
+    def _count(self, address, key: str, delta: int):
+        with self._lock:
+            counts = self.servers.setdefault(address, {"open": 0, "checked_out": 0, "waiting": 0})
+            counts[key] += delta
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {f"{host}:{port}": dict(counts) for (host, port), counts in self.servers.items()}
+
+    def longest_wait(self) -> float:
+        """Seconds the oldest checkout still pending has been waiting; 0 when none is"""
+        with self._lock:
+            oldest = min(self._waiting_since.values(), default=None)
+        return 0.0 if oldest is None else time.perf_counter() - oldest
+
+    def _checkout_done(self, event) -> float:
+        now = time.perf_counter()
+        with self._lock:
+            started = self._waiting_since.pop(threading.get_ident(), now)
+        self._count(event.address, "waiting", -1)
+        CHECKOUTS_WAITING.dec()
+        return now - started
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._waiting_since[threading.get_ident()] = time.perf_counter()
+        self._count(event.address, "waiting", 1)
+        CHECKOUTS_WAITING.inc()
+
+    def connection_checked_out(self, event):
+        CHECKOUT_WAIT.observe(self._checkout_done(event))
+        self._count(event.address, "checked_out", 1)
+        CONNECTIONS_CHECKED_OUT.inc()
+
+    def connection_check_out_failed(self, event):
+        self._checkout_done(event)
+        CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_in(self, event):
+        self._count(event.address, "checked_out", -1)
+        CONNECTIONS_CHECKED_OUT.dec()
+
+    def connection_created(self, event):
+        self._count(event.address, "open", 1)
+        CONNECTIONS_OPEN.inc()
+
+    def connection_closed(self, event):
+        self._count(event.address, "open", -1)
+        CONNECTIONS_OPEN.dec()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+class StateCollector:
+    """Caches and worker stats, read when Prometheus scrapes"""
+
+    def describe(self):
+        # Nothing to check at registration; collect() only works once the app is imported
+        return []
+
+    def collect(self):
+        # Imported here: database.py imports this module to register the listeners
+        from auth import principal_cache
+        from cache import catalog_cache
+        from invalidation_bus import bus
+        import contact_queue
+        import hashing
+        import snapshot
+
+        caches = {"catalog": catalog_cache, "admin_principals": principal_cache}
+        hits = CounterMetricFamily("cache_hits", "Cache lookups that found an entry", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache lookups that missed", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Share of lookups served from the cache since start", labels=["cache"])
+        entries = GaugeMetricFamily("cache_entries", "Entries currently cached", labels=["cache"])
+        for name, cache in caches.items():
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            lookups = cache.hits + cache.misses
+            ratio.add_metric([name], cache.hits / lookups if lookups else 0.0)
+            entries.add_metric([name], len(cache))
+        yield from (hits, misses, ratio, entries)
+
+        yield GaugeMetricFamily("catalog_snapshot_products", "Products in the catalog snapshot", value=len(snapshot.current()))
+        for prefix, stats in (
+            ("password_hashing", hashing.stats),
+            ("contact_queue", contact_queue.stats),
+            ("invalidation", bus.stats),
+        ):
+            for key, value in stats.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if key in COUNTER_STATS[prefix]:
+                    # The family appends _total unless the key already ends with it
+                    name = f"{prefix}_{key[:-len('_total')] if key.endswith('_total') else key}"
+                    yield CounterMetricFamily(name, f"{prefix} stats: {key}", value=value)
+                else:
+                    yield GaugeMetricFamily(f"{prefix}_{key}", f"{prefix} stats: {key}", value=value)
+
+
+REGISTRY.register(StateCollector())
+
+
+def _allowed(request) -> bool:
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+    try:
+        address = ipaddress.ip_address(request.client.host)
+    except (AttributeError, ValueError):
+        return False
+    return any(address in network for network in ALLOWED_NETWORKS)
+
+
+async def metrics_endpoint(request):
+    if not _allowed(request):
+        return PlainTextResponse("Forbidden", status_code=403)
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -54,6 +54,8 @@ class ProductUpdate(BaseModel):
 class Product(ProductBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     images: List[str] = []
+    # Resized variants per stored image: {file stem: {width: {format: url}}}
+    image_variants: Dict[str, Dict[str, Dict[str, str]]] = {}
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -88,6 +90,24 @@ class ContactForm(ContactFormBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     is_read: bool = False
 
+class ContactFormSummary(BaseModel):
+    """Inbox row: a contact form without its message body"""
+    id: str
+    name: str
+    email: EmailStr
+    phone: str
+    company: Optional[str] = None
+    product_id: Optional[str] = None
+    created_at: datetime
+    is_read: bool = False
+
+class ContactFormCounts(BaseModel):
+    total: int
+    unread: int
+
+class ContactFormIds(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=1000)
+
 # Admin User Model
 class AdminUserBase(BaseModel):
     username: str
@@ -0,0 +1,76 @@
+"""
+Keyset pagination and NDJSON streaming for listings.
+Pages are ordered on (created_at, id) and addressed by an opaque ``after``
+cursor, so each page is an index range scan no matter how deep it is.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+import json
+
+MAX_PAGE_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+ASCENDING = [("created_at", 1), ("id", 1)]
+DESCENDING = [("created_at", -1), ("id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["created_at"].isoformat(), doc["id"]]).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, doc_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(doc_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_filter(cursor: str, sort: list) -> dict:
+    """Mongo filter selecting documents that come after ``cursor`` in ``sort`` order"""
+    created_at, doc_id = decode_cursor(cursor)
+    op = "$gt" if sort[0][1] == 1 else "$lt"
+    return {"$or": [
+        {"created_at": {op: created_at}},
+        {"created_at": created_at, "id": {op: doc_id}},
+    ]}
+
+
+async def fetch_page(collection, query: dict, sort: list, limit: int = None, projection: dict = None):
+    """Return (documents, next_cursor); next_cursor is None on the last page"""
+    cursor = collection.find(query, projection).sort(sort)
+    if limit is None:
+        return await cursor.to_list(None), None
+    docs = await cursor.limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
+
+
+def page_headers(request: Request, next_cursor: str = None) -> dict:
+    if next_cursor is None:
+        return {}
+    next_url = request.url.include_query_params(after=next_cursor)
+    return {NEXT_CURSOR_HEADER: next_cursor, "Link": f'<{next_url}>; rel="next"'}
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(cursor, render) -> StreamingResponse:
+    """Stream documents from a Motor cursor (or any iterable) as they arrive, one ``render(doc)`` per line"""
+    async def lines():
+        if hasattr(cursor, "__aiter__"):
+            async for doc in cursor:
+                yield render(doc) + b"\n"
+        else:
+            for doc in cursor:
+                yield render(doc) + b"\n"
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,410 @@
+"""
+Bulk product import and export.
+Uploads (NDJSON or CSV) are spooled to a temporary file as they arrive and
+then parsed row by row and written in batches: categories are resolved with
+one query per batch and the rows go to MongoDB as a single bulk_write.
+
+Rows without an ``id`` are new products, validated against ProductCreate; they
+need a name and category, everything else defaults. Rows with an ``id`` are
+upserts that only set the fields the row contains, so a price-only CSV leaves
+names and specs alone; creating a product this way also needs a name and
+category. Bytes that are not UTF-8 and malformed lines fail their own row.
+
+CSV columns are flattened product fields, e.g.
+    id, category_id, name.tr, name.en, description.tr, features.tr, specs.power, price, is_active
+where ``features.<lang>`` holds the features separated by FEATURE_SEPARATOR.
+``category_id`` may hold a category id or slug. Empty cells are left out of
+the row, and a CSV column updates one key (``name.en`` keeps ``name.tr``)
+where an NDJSON object replaces the whole field.
+"""
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import uuid
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+import catalog_events
+from database import categories_collection, products_collection
+from models import ProductCreate, ProductUpdate
+from projection import LANGUAGES, MULTILINGUAL_FIELDS
+from uploads import UploadTooLarge
+
+IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_BYTES = int(os.getenv("PRODUCT_IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+MAX_REPORTED_ERRORS = 100
+# Spool uploads in memory up to this size, on disk beyond it
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+CSV_MEDIA_TYPE = "text/csv"
+FEATURE_SEPARATOR = "|"
+_TRUE = {"1", "true", "yes", "evet", "on"}
+_FALSE = {"0", "false", "no", "hayir", "hayır", "off"}
+# Fields an import may write; anything else in a row (images, created_at, ...) is ignored
+IMPORT_FIELDS = tuple(ProductCreate.model_fields)
+# Written when a row creates a product and leaves these out
+NEW_PRODUCT_DEFAULTS = {
+    "description": {},
+    "specs": {},
+    "features": {},
+    "price": ProductCreate.model_fields["price"].default,
+    "is_active": ProductCreate.model_fields["is_active"].default,
+}
+# Fields whose CSV columns (name.en, specs.power) update a single key
+KEYED_FIELDS = (*MULTILINGUAL_FIELDS, "specs")
+# Undecodable bytes, kept by the surrogateescape error handler
+_UNDECODABLE = re.compile("[\udc80-\udcff]")
+NOT_UTF8 = "Not valid UTF-8; save the file with UTF-8 encoding"
+
+
+async def spool_body(request: Request):
+    """Copy the request body into a temporary file, enforcing IMPORT_MAX_BYTES"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise UploadTooLarge()
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def _text(spool) -> io.TextIOWrapper:
+    # utf-8-sig drops the BOM spreadsheet programs put in front of CSV exports;
+    # surrogateescape lets one badly encoded row fail instead of the whole import
+    return io.TextIOWrapper(spool, encoding="utf-8-sig", errors="surrogateescape", newline="")
+
+
+def ndjson_rows(spool) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, row, error) for each non-blank line"""
+    for number, line in enumerate(_text(spool), start=1):
+        if not line.strip():
+            continue
+        if _UNDECODABLE.search(line):
+            yield number, None, NOT_UTF8
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, row, None
+
+
+def _csv_column(column: str) -> bool:
+    field, _, key = column.partition(".")
+    if not key:
+        return column in ("id", "category_id", "price", "is_active")
+    if field in MULTILINGUAL_FIELDS:
+        return key in LANGUAGES
+    return field == "specs"
+
+
+def _csv_records(reader) -> Iterator[Tuple[Optional[list], Optional[str]]]:
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield None, f"Malformed CSV: {exc}"
+            continue
+        if any(_UNDECODABLE.search(value) for value in values):
+            yield None, NOT_UTF8
+            continue
+        yield values, None
+
+
+def csv_rows(spool) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(CSV line number, row, error) for each record, nested back into product fields"""
+    reader = csv.reader(_text(spool))
+    try:
+        header = [column.strip() for column in next(reader, [])]
+    except csv.Error as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed CSV header: {exc}")
+    if any(_UNDECODABLE.search(column) for column in header):
+        raise HTTPException(status_code=400, detail=f"CSV header: {NOT_UTF8}")
+    unknown = [column for column in header if not _csv_column(column)]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown CSV columns: {', '.join(unknown)}")
+
+    for values, error in _csv_records(reader):
+        number = reader.line_num
+        if error is not None:
+            yield number, None, error
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if len(values) > len(header):
+            yield number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        row = {}
+        for column, value in zip(header, values):
+            value = value.strip()
+            if not value:
+                continue
+            field, _, key = column.partition(".")
+            if field == "features":
+                row.setdefault(field, {})[key] = [item.strip() for item in value.split(FEATURE_SEPARATOR) if item.strip()]
+            elif key:
+                row.setdefault(field, {})[key] = value
+            elif field == "is_active":
+                if value.lower() not in _TRUE | _FALSE:
+                    error = f"is_active: expected true or false, got {value!r}"
+                row[field] = value.lower() in _TRUE
+            else:
+                row[field] = value
+        yield number, (None if error else row), error
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+
+def _validate(row: dict, product_id: Optional[str]) -> dict:
+    """The product fields a row writes: all of them for a new product, only its own for an upsert"""
+    if product_id is None:
+        product = ProductCreate.model_validate({**NEW_PRODUCT_DEFAULTS, **row})
+        fields = product.model_dump()
+    else:
+        update = ProductUpdate.model_validate(row)
+        fields = {
+            field: value for field, value in update.model_dump(exclude_unset=True).items()
+            if value is not None and field in IMPORT_FIELDS
+        }
+        if not fields:
+            raise ValueError("Row has no product fields")
+    if "name" in fields and not any(name.strip() for name in fields["name"].values()):
+        raise ValueError("name: at least one language is required")
+    return fields
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.stopped_at: Optional[int] = None
+
+    def error(self, row: int, detail: str, product_id: Optional[str] = None):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "id": product_id, "detail": detail})
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "stopped_at_row": self.stopped_at,
+        }
+
+
+class ProductImporter:
+    """
+    Validate rows and write them in batches; ``ordered`` stops at the first
+    failing row. With ``merge``, keyed fields of rows with an id are updated
+    key by key, as CSV columns name them, instead of replaced.
+    """
+
+    def __init__(self, ordered: bool = False, batch_size: int = IMPORT_BATCH_SIZE, merge: bool = False):
+        self.ordered = ordered
+        self.batch_size = batch_size
+        self.merge = merge
+        self.report = ImportReport()
+        self._categories: Dict[str, Optional[str]] = {}
+        # (row number, product id or None, validated fields)
+        self._batch: List[Tuple[int, Optional[str], dict]] = []
+
+    async def run(self, rows) -> dict:
+        for number, row, error in rows:
+            self.report.processed += 1
+            if error is None:
+                product_id = row.get("id")
+                if product_id is not None and (not isinstance(product_id, str) or not product_id.strip()):
+                    error = "id must be a non-empty string"
+                else:
+                    try:
+                        self._batch.append((number, product_id, _validate(row, product_id)))
+                    except ValidationError as exc:
+                        error = _format_validation_error(exc)
+                    except ValueError as exc:
+                        error = str(exc)
+            if error is not None:
+                self.report.error(number, error, row.get("id") if isinstance(row, dict) else None)
+                if self.ordered:
+                    # Rows before the failing one are still written, in order
+                    if await self._flush():
+                        self.report.stopped_at = number
+                    break
+            if len(self._batch) >= self.batch_size:
+                if not await self._flush():
+                    break
+        else:
+            await self._flush()
+        return self.report.as_dict()
+
+    async def _resolve_categories(self, refs):
+        missing = [ref for ref in refs if ref not in self._categories]
+        if not missing:
+            return
+        for ref in missing:
+            self._categories[ref] = None
+        async for category in categories_collection.find(
+            {"$or": [{"id": {"$in": missing}}, {"slug": {"$in": missing}}]}, {"_id": 0, "id": 1, "slug": 1}
+        ):
+            self._categories[category["id"]] = category["id"]
+            if category["slug"] in self._categories:
+                self._categories[category["slug"]] = category["id"]
+
+    def _update(self, fields: dict, now: datetime) -> dict:
+        """$set only what the row holds; defaults apply only when the upsert creates the product"""
+        values = {}
+        for field, value in fields.items():
+            if self.merge and field in KEYED_FIELDS:
+                values.update({f"{field}.{key}": item for key, item in value.items()})
+            else:
+                values[field] = value
+        values["updated_at"] = now
+        on_insert = {field: value for field, value in NEW_PRODUCT_DEFAULTS.items() if field not in fields}
+        return {"$set": values, "$setOnInsert": {**on_insert, "images": [], "created_at": now}}
+
+    def _reject(self, number: int, detail: str, product_id: Optional[str]) -> bool:
+        """Record a row failing at write time; True when an ordered import must stop"""
+        self.report.error(number, detail, product_id)
+        if self.ordered:
+            self.report.stopped_at = number
+        return self.ordered
+
+    async def _flush(self) -> bool:
+        """Write the pending batch; False when an ordered import must stop"""
+        batch, self._batch = self._batch, []
+        if not batch:
+            return True
+        await self._resolve_categories({fields["category_id"] for _, _, fields in batch if "category_id" in fields})
+        upsert_ids = [product_id for _, product_id, _ in batch if product_id is not None]
+        previous = await products_collection.find(
+            {"id": {"$in": upsert_ids}}, {"_id": 0, "id": 1, "category_id": 1}
+        ).to_list(None)
+        existing = {doc["id"] for doc in previous}
+
+        now = datetime.utcnow()
+        operations, written = [], []
+        for number, product_id, fields in batch:
+            if "category_id" in fields:
+                category_id = self._categories[fields["category_id"]]
+                if category_id is None:
+                    if self._reject(number, "Category not found", product_id):
+                        break
+                    continue
+                fields = {**fields, "category_id": category_id}
+            if product_id is None:
+                product_id = str(uuid.uuid4())
+                operations.append(InsertOne({
+                    **fields, "id": product_id, "images": [], "created_at": now, "updated_at": now,
+                }))
+            elif product_id in existing:
+                operations.append(UpdateOne({"id": product_id}, self._update(fields, now)))
+            else:
+                missing = [field for field in ("name", "category_id") if field not in fields]
+                if missing:
+                    if self._reject(number, f"New product needs {' and '.join(missing)}", product_id):
+                        break
+                    continue
+                operations.append(UpdateOne({"id": product_id}, self._update(fields, now), upsert=True))
+                # A later row of this batch with the same id updates the product created here
+                existing.add(product_id)
+            written.append((number, product_id))
+        if not operations:
+            return self.report.stopped_at is None
+
+        ids = [product_id for _, product_id in written]
+        try:
+            result = (await products_collection.bulk_write(operations, ordered=self.ordered)).bulk_api_result
+        except BulkWriteError as exc:
+            result = exc.details
+            for write_error in result["writeErrors"]:
+                number, product_id = written[write_error["index"]]
+                self.report.error(number, write_error["errmsg"], product_id)
+                if self.ordered:
+                    self.report.stopped_at = number
+        self.report.inserted += result["nInserted"] + result["nUpserted"]
+        self.report.updated += result["nMatched"]
+
+        saved = await products_collection.find({"id": {"$in": ids}}, {"_id": 0}).to_list(None)
+        catalog_events.products_saved(saved, {doc["category_id"] for doc in previous})
+        return self.report.stopped_at is None
+
+
+def csv_header(spec_keys: List[str]) -> List[str]:
+    columns = ["id", "category_id"]
+    for field in MULTILINGUAL_FIELDS:
+        columns.extend(f"{field}.{lang}" for lang in LANGUAGES)
+    columns.extend(f"specs.{key}" for key in spec_keys)
+    columns.extend(["price", "is_active"])
+    return columns
+
+
+def csv_record(doc: dict, header: List[str]) -> List[str]:
+    record = []
+    for column in header:
+        field, _, key = column.partition(".")
+        value = doc.get(field)
+        if key:
+            value = (value or {}).get(key)
+        if isinstance(value, list):
+            value = FEATURE_SEPARATOR.join(value)
+        elif isinstance(value, bool):
+            value = "true" if value else "false"
+        record.append("" if value is None else str(value))
+    return record
+
+
+def spec_keys_pipeline(query: dict) -> List[dict]:
+    return [
+        {"$match": query},
+        {"$project": {"specs": {"$objectToArray": "$specs"}}},
+        {"$unwind": "$specs"},
+        {"$group": {"_id": "$specs.k"}},
+    ]
+
+
+async def spec_keys(query: dict) -> List[str]:
+    return sorted([group["_id"] async for group in products_collection.aggregate(spec_keys_pipeline(query))])
+
+
+async def csv_lines(cursor, header: List[str]):
+    """Encode documents from a Motor cursor as CSV, a few hundred rows per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    rows = 0
+    async for doc in cursor:
+        writer.writerow(csv_record(doc, header))
+        rows += 1
+        if rows % 256 == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
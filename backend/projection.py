@@ -0,0 +1,68 @@
+"""
+Language and field projection for catalog reads.
+``?lang=`` collapses the multilingual dicts to a single language (falling back
+to Turkish) and ``?fields=`` keeps only the listed fields, so listing pages only
+pay to validate and encode the parts of each document they actually render.
+Documents come from the catalog snapshot and are reduced in ``project``.
+"""
+from fastapi import HTTPException
+from typing import List, Optional
+import time
+
+from serialization import render_document, render_documents, render_list, render_one
+import timing
+
+LANGUAGES = ("tr", "en", "ar", "ru")
+DEFAULT_LANGUAGE = "tr"
+LANG_PATTERN = "^(" + "|".join(LANGUAGES) + ")$"
+
+MULTILINGUAL_FIELDS = ("name", "description", "features")
+
+
+def parse_fields(fields: Optional[str], model) -> Optional[tuple]:
+    """Validate a comma separated field list against ``model``; ``id`` is always included"""
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(requested | {"id"}))
+
+
+def localize(value, lang: str):
+    """Pick one language out of a multilingual dict, falling back to the default language"""
+    if not isinstance(value, dict):
+        return value
+    if lang in value:
+        return value[lang]
+    return value.get(DEFAULT_LANGUAGE)
+
+
+def project(doc: dict, model, lang: Optional[str] = None, fields: Optional[tuple] = None) -> dict:
+    """Reduce a stored document to the requested fields, collapsed to ``lang`` if given"""
+    names = fields or tuple(model.model_fields)
+    projected = {name: doc[name] for name in names if name in doc}
+    if lang:
+        for name in MULTILINGUAL_FIELDS:
+            if name in projected:
+                projected[name] = localize(projected[name], lang)
+    return projected
+
+
+def render_projected_list(model, docs: List[dict], lang: Optional[str] = None, fields: Optional[tuple] = None) -> bytes:
+    if lang is None and fields is None:
+        return render_list(model, docs)
+    started = time.perf_counter()
+    projected = [project(doc, model, lang, fields) for doc in docs]
+    timing.add("validate", time.perf_counter() - started)
+    return render_documents(projected)
+
+
+def render_projected_one(model, doc: dict, lang: Optional[str] = None, fields: Optional[tuple] = None) -> bytes:
+    if lang is None and fields is None:
+        return render_one(model, doc)
+    started = time.perf_counter()
+    projected = project(doc, model, lang, fields)
+    timing.add("validate", time.perf_counter() - started)
+    return render_document(projected)
@@ -3,6 +3,7 @@ from datetime import timedelta
 
 from models import AdminLogin, Token
 from auth import authenticate_admin, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_admin
+from hashing import HashingQueueFull
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -10,7 +11,14 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/login/", response_model=Token)
 async def login(credentials: AdminLogin):
     """Admin login endpoint"""
-    admin = await authenticate_admin(credentials.username, credentials.password)
+    try:
+        admin = await authenticate_admin(credentials.username, credentials.password)
+    except HashingQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,27 +1,59 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
+from pymongo import ReturnDocument
+
 from models import Category, CategoryCreate
 from database import categories_collection
 from auth import get_current_admin
+import catalog_events
+import snapshot
+from cache import catalog_cache, catalog_last_changed
+from http_cache import conditional_response, last_modified, rendered
+from projection import LANG_PATTERN, parse_fields, render_projected_list, render_projected_one
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 @router.get("/", response_model=List[Category])
-async def get_categories():
-    """Get all categories"""
-    categories = await categories_collection.find().to_list(100)
-    return [Category(**cat) for cat in categories]
+async def get_categories(
+    request: Request,
+    lang: Optional[str] = Query(None, pattern=LANG_PATTERN),
+    fields: Optional[str] = None,
+):
+    """Get all categories, optionally projected with lang/fields"""
+    fields = parse_fields(fields, Category)
+    cache_key = ("categories", lang, fields)
+    entry = catalog_cache.get(cache_key)
+    if entry is None:
+        categories = snapshot.current().categories
+        entry = rendered(
+            render_projected_list(Category, categories, lang, fields),
+            last_modified(categories, catalog_last_changed()),
+        )
+        catalog_cache.set(cache_key, entry)
+    return conditional_response(request, entry)
 
 @router.get("/{category_id}", response_model=Category)
-async def get_category(category_id: str):
-    """Get a single category by ID"""
-    category = await categories_collection.find_one({"id": category_id})
+async def get_category(
+    request: Request,
+    category_id: str,
+    lang: Optional[str] = Query(None, pattern=LANG_PATTERN),
+    fields: Optional[str] = None,
+):
+    """Get a single category by ID or slug, optionally projected with lang/fields"""
+    fields = parse_fields(fields, Category)
+    category = snapshot.current().category(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return Category(**category)
+    # Keyed by id so a slug lookup is invalidated together with the category
+    cache_key = ("category", category["id"], lang, fields)
+    entry = catalog_cache.get(cache_key)
+    if entry is None:
+        entry = rendered(render_projected_one(Category, category, lang, fields), last_modified([category]))
+        catalog_cache.set(cache_key, entry)
+    return conditional_response(request, entry)
 
 @router.post("/", response_model=Category)
 async def create_category(category: CategoryCreate, admin: dict = Depends(get_current_admin)):
@@ -33,9 +65,10 @@ async def create_category(category: CategoryCreate, admin: dict = Depends(get_cu
     
     category_data = category.dict()
     category_data["id"] = str(uuid.uuid4())
-    category_data["created_at"] = datetime.utcnow()
+    category_data["created_at"] = category_data["updated_at"] = datetime.utcnow()
     
     await categories_collection.insert_one(category_data)
+    catalog_events.category_saved(category_data)
     return Category(**category_data)
 
 @router.put("/{category_id}", response_model=Category)
@@ -46,15 +79,21 @@ async def update_category(category_id: str, category_update: CategoryCreate, adm
         raise HTTPException(status_code=404, detail="Category not found")
     
     update_data = category_update.dict()
-    await categories_collection.update_one({"id": category_id}, {"$set": update_data})
-    
-    updated = await categories_collection.find_one({"id": category_id})
+    update_data["updated_at"] = datetime.utcnow()
+    updated = await categories_collection.find_one_and_update(
+        {"id": category_id}, {"$set": update_data}, return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        # Deleted since it was read above
+        raise HTTPException(status_code=404, detail="Category not found")
+    catalog_events.category_saved(updated)
     return Category(**updated)
 
 @router.delete("/{category_id}")
 async def delete_category(category_id: str, admin: dict = Depends(get_current_admin)):
     """Delete a category (Admin only)"""
-    result = await categories_collection.delete_one({"id": category_id})
-    if result.deleted_count == 0:
+    deleted = await categories_collection.find_one_and_delete({"id": category_id})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Category not found")
+    catalog_events.category_deleted(deleted)
     return {"message": "Category deleted successfully"}
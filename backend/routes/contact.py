@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
-from models import ContactForm, ContactFormCreate
+from models import ContactForm, ContactFormCounts, ContactFormCreate, ContactFormIds, ContactFormSummary
 from database import contact_forms_collection
 from auth import get_current_admin
+import contact_queue
+from contact_queue import ContactQueueFull
+from serialization import json_response, render_list, render_one
+from pagination import DESCENDING, MAX_PAGE_SIZE, after_filter, fetch_page, ndjson_response, page_headers, wants_ndjson
 
 router = APIRouter(prefix="/contact", tags=["Contact"])
 
+SUMMARY_PROJECTION = {"_id": 0, "message": 0}
+
 @router.post("/", response_model=ContactForm)
 async def create_contact_form(contact: ContactFormCreate):
     """Submit a contact form (Public)"""
@@ -17,18 +23,82 @@ async def create_contact_form(contact: ContactFormCreate):
     contact_data["created_at"] = datetime.utcnow()
     contact_data["is_read"] = False
     
-    await contact_forms_collection.insert_one(contact_data)
+    # Written to the database in batches by contact_queue's background writer
+    try:
+        contact_queue.submit(contact_data)
+    except ContactQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many submissions in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     return ContactForm(**contact_data)
 
 @router.get("/", response_model=List[ContactForm])
-async def get_contact_forms(admin: dict = Depends(get_current_admin), is_read: bool = None):
-    """Get all contact forms (Admin only)"""
+async def get_contact_forms(
+    request: Request,
+    admin: dict = Depends(get_current_admin),
+    is_read: bool = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Get contact forms, newest first, paginated with limit/after (Admin only)"""
     query = {}
     if is_read is not None:
         query["is_read"] = is_read
+    if after:
+        query.update(after_filter(after, DESCENDING))
+    
+    if wants_ndjson(request):
+        cursor = contact_forms_collection.find(query).sort(DESCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        return ndjson_response(cursor, lambda doc: render_one(ContactForm, doc))
     
-    contacts = await contact_forms_collection.find(query).sort("created_at", -1).to_list(1000)
-    return [ContactForm(**contact) for contact in contacts]
+    contacts, next_cursor = await fetch_page(contact_forms_collection, query, DESCENDING, limit)
+    return json_response(render_list(ContactForm, contacts), headers=page_headers(request, next_cursor))
+
+@router.get("/counts", response_model=ContactFormCounts)
+async def get_contact_form_counts(admin: dict = Depends(get_current_admin)):
+    """Total and unread contact forms for the inbox badge (Admin only)"""
+    # The unread count is a count scan over the is_read index; the total comes from collection metadata
+    unread = await contact_forms_collection.count_documents({"is_read": False})
+    total = await contact_forms_collection.estimated_document_count()
+    return ContactFormCounts(total=max(total, unread), unread=unread)
+
+@router.get("/summaries", response_model=List[ContactFormSummary])
+async def get_contact_form_summaries(
+    request: Request,
+    admin: dict = Depends(get_current_admin),
+    is_read: bool = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Inbox listing without message bodies, newest first, paginated with limit/after (Admin only)"""
+    query = {}
+    if is_read is not None:
+        query["is_read"] = is_read
+    if after:
+        query.update(after_filter(after, DESCENDING))
+    contacts, next_cursor = await fetch_page(
+        contact_forms_collection, query, DESCENDING, limit, projection=SUMMARY_PROJECTION
+    )
+    return json_response(render_list(ContactFormSummary, contacts), headers=page_headers(request, next_cursor))
+
+@router.put("/mark-read")
+async def mark_contacts_read(selection: ContactFormIds, admin: dict = Depends(get_current_admin)):
+    """Mark several contact forms as read in one update (Admin only)"""
+    result = await contact_forms_collection.update_many(
+        {"id": {"$in": selection.ids}, "is_read": False},
+        {"$set": {"is_read": True}}
+    )
+    return {"message": "Contact forms marked as read", "modified": result.modified_count}
+
+@router.post("/delete")
+async def delete_contact_forms(selection: ContactFormIds, admin: dict = Depends(get_current_admin)):
+    """Delete several contact forms in one request (Admin only)"""
+    result = await contact_forms_collection.delete_many({"id": {"$in": selection.ids}})
+    return {"message": "Contact forms deleted successfully", "deleted": result.deleted_count}
 
 @router.put("/{contact_id}/mark-read")
 async def mark_contact_read(contact_id: str, admin: dict = Depends(get_current_admin)):
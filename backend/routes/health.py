@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+import asyncio
+import os
+
+import catalog_events
+import database
+import snapshot
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+# Requests queue for a connection: the oldest pending checkout has waited this
+# long, or more than this many checkouts are pending
+MAX_CHECKOUT_WAIT = float(os.getenv("HEALTH_MAX_CHECKOUT_WAIT", "0.5"))
+MAX_WAITING = int(os.getenv("HEALTH_MAX_WAITING", str(database.MAX_POOL_SIZE)))
+PING_TIMEOUT = float(os.getenv("HEALTH_PING_TIMEOUT", "1"))
+
+@router.get("/live")
+async def live():
+    """The worker's event loop is running"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready(request: Request):
+    """
+    Whether this worker can serve traffic right now; 503 tells the load balancer to skip it.
+    A database outage alone does not make a worker not ready: catalog reads are served from
+    the snapshot, so the database state is only reported in the body.
+    """
+    reasons = []
+    servers = database.pool_metrics.usage()
+    busiest = max((counts["checked_out"] / database.MAX_POOL_SIZE for counts in servers.values()), default=0.0)
+    waiting = sum(counts["waiting"] for counts in servers.values())
+    longest_wait = database.pool_metrics.longest_wait()
+    if not getattr(request.app.state, "ready", False):
+        reasons.append("starting or shutting down")
+    if catalog_events.loaded_at is None:
+        reasons.append("catalog snapshot not loaded")
+    queueing = longest_wait >= MAX_CHECKOUT_WAIT or waiting > MAX_WAITING
+    if queueing:
+        reasons.append("connection pool saturated")
+        # The ping would only queue behind the requests already waiting
+        database_state = "saturated"
+    else:
+        try:
+            await asyncio.wait_for(database.client.admin.command("ping"), PING_TIMEOUT)
+            database_state = "ok"
+        except Exception:
+            database_state = "unreachable"
+    body = {
+        "status": "not_ready" if reasons else "ready",
+        "reasons": reasons,
+        "database": database_state,
+        "catalog_products": len(snapshot.current()),
+        "catalog_loaded_at": catalog_events.loaded_at.isoformat() if catalog_events.loaded_at else None,
+        "pool": {
+            "max_size": database.MAX_POOL_SIZE,
+            "min_size": database.MIN_POOL_SIZE,
+            "usage": round(busiest, 3),
+            "waiting": waiting,
+            "longest_wait": round(longest_wait, 3),
+            "servers": servers,
+        },
+    }
+    return JSONResponse(body, status_code=503 if reasons else 200)
@@ -1,39 +1,125 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, Query, BackgroundTasks
+from fastapi.responses import RedirectResponse, StreamingResponse
 from typing import List, Optional
 from datetime import datetime
 import uuid
-import shutil
-from pathlib import Path
+from itertools import islice
+
+from pymongo import ReturnDocument
 
 from models import Product, ProductCreate, ProductUpdate
 from database import products_collection, categories_collection
 from auth import get_current_admin
+import catalog_events
+import snapshot
+from cache import catalog_cache, catalog_last_changed
+from serialization import json_response, render_document, render_one
+from http_cache import conditional_response, last_modified, rendered
+from pagination import ASCENDING, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, ndjson_response, page_headers, wants_ndjson
+from projection import DEFAULT_LANGUAGE, LANG_PATTERN, parse_fields, project, render_projected_list, render_projected_one
+from uploads import IMAGE_EXTENSIONS, MAX_UPLOAD_BYTES, UploadTooLarge, store_upload, upload_url
+from images import VARIANT_FORMATS, generate_variants, local_upload, pick_variant
+from search import search_index
+from facets import facet_index, parse_spec_filter
+from product_io import (
+    CSV_MEDIA_TYPE, IMPORT_MAX_BYTES, ProductImporter, csv_header, csv_lines, csv_rows, ndjson_rows, spec_keys, spool_body,
+)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
-# Upload directory
-UPLOAD_DIR = Path("/app/backend/uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
 @router.get("/", response_model=List[Product])
-async def get_products(category_id: Optional[str] = None, is_active: Optional[bool] = True):
-    """Get all products, optionally filtered by category"""
-    query = {}
-    if category_id:
-        query["category_id"] = category_id
-    if is_active is not None:
-        query["is_active"] = is_active
-    
-    products = await products_collection.find(query).to_list(1000)
-    return [Product(**product) for product in products]
+async def get_products(
+    request: Request,
+    category_id: Optional[str] = None,
+    is_active: Optional[bool] = True,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    lang: Optional[str] = Query(None, pattern=LANG_PATTERN),
+    fields: Optional[str] = None,
+    spec: Optional[List[str]] = Query(None),
+):
+    """Get all products, optionally filtered by category and specs (spec=key:value), paginated and projected with lang/fields"""
+    fields = parse_fields(fields, Product)
+    selected_specs = parse_spec_filter(spec)
+    filters = {"category_id": category_id, "is_active": is_active, "specs": selected_specs, "after": after}
+    
+    if wants_ndjson(request):
+        products = islice(snapshot.current().select(**filters), limit)
+        return ndjson_response(products, lambda doc: render_projected_one(Product, doc, lang, fields))
+    
+    spec_key = tuple((key, tuple(values)) for key, values in selected_specs.items())
+    cache_key = ("products", category_id or None, is_active, limit, after, lang, fields, spec_key)
+    entry = catalog_cache.get(cache_key)
+    if entry is None:
+        products, next_cursor = snapshot.current().page(limit, **filters)
+        # Only the cursor is cached: the Link header is built from each request's own URL
+        entry = rendered(
+            render_projected_list(Product, products, lang, fields),
+            last_modified(products, catalog_last_changed()),
+            {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+        )
+        catalog_cache.set(cache_key, entry)
+    return conditional_response(request, entry, page_headers(request, entry.headers.get(NEXT_CURSOR_HEADER)))
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    category_id: Optional[str] = None,
+    admin: dict = Depends(get_current_admin),
+):
+    """Stream the catalog as NDJSON (full documents) or CSV (the import columns) (Admin only)"""
+    query = {"category_id": category_id} if category_id else {}
+    cursor = products_collection.find(query, {"_id": 0}).sort(ASCENDING)
+    if format == "ndjson":
+        response = ndjson_response(cursor, lambda doc: render_one(Product, doc))
+    else:
+        header = csv_header(await spec_keys(query))
+        response = StreamingResponse(csv_lines(cursor, header), media_type=f"{CSV_MEDIA_TYPE}; charset=utf-8")
+    response.headers["Content-Disposition"] = f'attachment; filename="products.{format}"'
+    return response
+
+@router.get("/facets")
+async def get_product_facets(
+    category_id: Optional[str] = None,
+    spec: Optional[List[str]] = Query(None),
+):
+    """Spec value counts for active products, optionally within a category and spec selection (spec=key:value)"""
+    total, facets = facet_index.facets(category_id or None, parse_spec_filter(spec))
+    return json_response(render_document({"total": total, "facets": facets}))
+
+@router.get("/search")
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    lang: str = Query(DEFAULT_LANGUAGE, pattern=LANG_PATTERN),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Full-text search over active products in one language, with prefix matching on the last word"""
+    products, suggestions = search_index.search(q, lang, limit)
+    return json_response(render_document({
+        "query": q,
+        "lang": lang,
+        "results": [project(doc, Product, lang, None) for doc in products],
+        "suggestions": suggestions,
+    }))
 
 @router.get("/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    """Get a single product by ID"""
-    product = await products_collection.find_one({"id": product_id})
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return Product(**product)
+async def get_product(
+    request: Request,
+    product_id: str,
+    lang: Optional[str] = Query(None, pattern=LANG_PATTERN),
+    fields: Optional[str] = None,
+):
+    """Get a single product by ID, optionally projected with lang/fields"""
+    fields = parse_fields(fields, Product)
+    cache_key = ("product", product_id, lang, fields)
+    entry = catalog_cache.get(cache_key)
+    if entry is None:
+        product = snapshot.current().product_by_id.get(product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = rendered(render_projected_one(Product, product, lang, fields), last_modified([product]))
+        catalog_cache.set(cache_key, entry)
+    return conditional_response(request, entry)
 
 @router.post("/", response_model=Product)
 async def create_product(product: ProductCreate, admin: dict = Depends(get_current_admin)):
@@ -51,8 +137,33 @@ async def create_product(product: ProductCreate, admin: dict = Depends(get_curre
     product_data["updated_at"] = datetime.utcnow()
     
     await products_collection.insert_one(product_data)
+    catalog_events.product_saved(product_data)
     return Product(**product_data)
 
+@router.post("/import")
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    ordered: bool = False,
+    admin: dict = Depends(get_current_admin),
+):
+    """
+    Create or update products from an NDJSON or CSV request body (Admin only).
+    Rows without an id are inserted as new products. Rows with an id are upserted
+    and only change the fields (CSV: the non-empty columns) they contain. With
+    ordered=true the import stops at the first failing row; otherwise every
+    valid row is written.
+    """
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith(CSV_MEDIA_TYPE) else "ndjson"
+    try:
+        spool = await spool_body(request)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Import larger than {IMPORT_MAX_BYTES} bytes")
+    with spool:
+        rows = csv_rows(spool) if format == "csv" else ndjson_rows(spool)
+        return await ProductImporter(ordered=ordered, merge=format == "csv").run(rows)
+
 @router.put("/{product_id}", response_model=Product)
 async def update_product(product_id: str, product_update: ProductUpdate, admin: dict = Depends(get_current_admin)):
     """Update a product (Admin only)"""
@@ -64,22 +175,31 @@ async def update_product(product_id: str, product_update: ProductUpdate, admin:
     update_data = {k: v for k, v in product_update.dict(exclude_unset=True).items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
     
-    if update_data:
-        await products_collection.update_one({"id": product_id}, {"$set": update_data})
-    
-    updated_product = await products_collection.find_one({"id": product_id})
+    updated_product = await products_collection.find_one_and_update(
+        {"id": product_id}, {"$set": update_data}, return_document=ReturnDocument.AFTER
+    )
+    if not updated_product:
+        # Deleted since it was read above
+        raise HTTPException(status_code=404, detail="Product not found")
+    catalog_events.product_saved(updated_product, existing_product)
     return Product(**updated_product)
 
 @router.delete("/{product_id}")
 async def delete_product(product_id: str, admin: dict = Depends(get_current_admin)):
     """Delete a product (Admin only)"""
-    result = await products_collection.delete_one({"id": product_id})
-    if result.deleted_count == 0:
+    deleted = await products_collection.find_one_and_delete({"id": product_id})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Product not found")
+    catalog_events.product_deleted(deleted)
     return {"message": "Product deleted successfully"}
 
 @router.post("/{product_id}/images")
-async def upload_product_image(product_id: str, file: UploadFile = File(...), admin: dict = Depends(get_current_admin)):
+async def upload_product_image(
+    product_id: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    admin: dict = Depends(get_current_admin),
+):
     """Upload an image for a product (Admin only)"""
     # Check if product exists
     product = await products_collection.find_one({"id": product_id})
@@ -87,26 +207,49 @@ async def upload_product_image(product_id: str, file: UploadFile = File(...), ad
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/jpg", "image/webp"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in IMAGE_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Invalid file type. Only images allowed.")
     
-    # Save file
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{product_id}_{uuid.uuid4()}.{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
+    # Save file under its content hash; identical images are stored once
+    try:
+        filename, already_stored = await store_upload(file, IMAGE_EXTENSIONS[file.content_type])
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Image larger than {MAX_UPLOAD_BYTES} bytes")
     
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    image_url = upload_url(filename)
+    if image_url not in product.get("images", []):
+        updated_product = await products_collection.find_one_and_update(
+            {"id": product_id},
+            {"$addToSet": {"images": image_url}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not updated_product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        catalog_events.product_saved(updated_product)
     
-    # Update product with new image
-    image_url = f"/api/uploads/{unique_filename}"
-    await products_collection.update_one(
-        {"id": product_id},
-        {"$push": {"images": image_url}, "$set": {"updated_at": datetime.utcnow()}}
-    )
+    # Resized variants are rendered after the response is sent
+    background_tasks.add_task(generate_variants, product_id, image_url)
     
-    return {"message": "Image uploaded successfully", "image_url": image_url}
+    return {"message": "Image uploaded successfully", "image_url": image_url, "deduplicated": already_stored}
+
+@router.get("/{product_id}/images/{image_index}")
+async def get_product_image(
+    request: Request,
+    product_id: str,
+    image_index: int,
+    width: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = Query(None, pattern="^(" + "|".join(VARIANT_FORMATS) + ")$"),
+):
+    """Redirect to the variant of a product image closest to the requested width"""
+    product = snapshot.current().product_by_id.get(product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    images = product.get("images", [])
+    if image_index < 0 or image_index >= len(images):
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    url = pick_variant(product, images[image_index], width, request.headers.get("accept", ""), format)
+    return RedirectResponse(url, status_code=307, headers={"Vary": "Accept", "Cache-Control": "no-cache"})
 
 @router.delete("/{product_id}/images/{image_index}")
 async def delete_product_image(product_id: str, image_index: int, admin: dict = Depends(get_current_admin)):
@@ -120,11 +263,17 @@ async def delete_product_image(product_id: str, image_index: int, admin: dict =
     
     # Remove image from database
     images = product.get("images", [])
-    images.pop(image_index)
+    removed = images.pop(image_index)
     
-    await products_collection.update_one(
-        {"id": product_id},
-        {"$set": {"images": images, "updated_at": datetime.utcnow()}}
+    update = {"$set": {"images": images, "updated_at": datetime.utcnow()}}
+    source = local_upload(removed)
+    if source is not None and removed not in images:
+        update["$unset"] = {f"image_variants.{source.stem}": ""}
+    updated_product = await products_collection.find_one_and_update(
+        {"id": product_id}, update, return_document=ReturnDocument.AFTER
     )
+    if not updated_product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    catalog_events.product_saved(updated_product)
     
     return {"message": "Image deleted successfully"}
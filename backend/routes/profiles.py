@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException, Depends, Path
+from fastapi.responses import PlainTextResponse
+
+from auth import get_current_admin
+from timing import PROFILE_ID_PATTERN, profile_path
+
+router = APIRouter(prefix="/profiles", tags=["Profiles"])
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str = Path(..., pattern=PROFILE_ID_PATTERN), admin: dict = Depends(get_current_admin)):
+    """Folded stacks recorded for a request sent with X-Profile: 1 (Admin only)"""
+    path = profile_path(profile_id)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(path.read_text())
@@ -0,0 +1,167 @@
+"""
+In-memory multilingual product search.
+An inverted index over name, description, features and spec values for each
+catalog language, built from products_collection at startup and updated on
+every product write (see catalog_events.py). Queries never touch MongoDB.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional
+import re
+import unicodedata
+
+from projection import DEFAULT_LANGUAGE, LANGUAGES
+
+# Field weights: a hit in the name ranks above a hit in the description
+FIELD_WEIGHTS = {"name": 4, "features": 2, "specs": 2, "description": 1}
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN = re.compile(r"\w+")
+# Harakat, superscript alef, Quranic marks and tatweel
+_ARABIC_MARKS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه", "ؤ": "و", "ئ": "ي"})
+# Folded to ASCII so people typing without a Turkish keyboard still match
+_TURKISH_LETTERS = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ç": "c", "ö": "o", "ü": "u", "â": "a", "î": "i", "û": "u"})
+
+
+def normalize(text: str, lang: str) -> str:
+    """Language-aware case folding used for both indexing and queries"""
+    text = unicodedata.normalize("NFC", text)
+    if lang == "tr":
+        # Turkish casing: I -> ı and İ -> i, which str.casefold gets wrong
+        text = text.replace("I", "ı").replace("İ", "i").lower().translate(_TURKISH_LETTERS)
+    elif lang == "ar":
+        text = _ARABIC_MARKS.sub("", text).translate(_ARABIC_LETTERS)
+    else:
+        text = text.casefold()
+        if lang == "ru":
+            text = text.replace("ё", "е")
+    return text
+
+
+def tokenize(text: str, lang: str) -> List[str]:
+    return _TOKEN.findall(normalize(text, lang))
+
+
+def _field_texts(doc: dict, lang: str):
+    for field in ("name", "description"):
+        value = (doc.get(field) or {}).get(lang)
+        if value:
+            yield field, value
+    for value in (doc.get("features") or {}).get(lang) or []:
+        yield "features", value
+    # Spec values ("220V", "3.5 KW") are not translated, so they are searchable in every language
+    for value in (doc.get("specs") or {}).values():
+        yield "specs", str(value)
+
+
+class SearchIndex:
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._docs: Dict[str, dict] = {}
+        # lang -> term -> product id -> weight
+        self._postings = {lang: defaultdict(dict) for lang in LANGUAGES}
+        self._terms = {lang: [] for lang in LANGUAGES}
+        self._dirty = {lang: False for lang in LANGUAGES}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def rebuild(self, docs):
+        self._reset()
+        for doc in docs:
+            self.add(doc)
+
+    def add(self, doc: dict):
+        """Index (or re-index) one product document"""
+        product_id = doc["id"]
+        if product_id in self._docs:
+            self.remove(product_id)
+        doc = {key: value for key, value in doc.items() if key != "_id"}
+        self._docs[product_id] = doc
+        for lang in LANGUAGES:
+            postings = self._postings[lang]
+            for field, text in _field_texts(doc, lang):
+                weight = FIELD_WEIGHTS[field]
+                for term in tokenize(text, lang):
+                    if term not in postings:
+                        self._dirty[lang] = True
+                    if postings[term].get(product_id, 0) < weight:
+                        postings[term][product_id] = weight
+
+    def remove(self, product_id: str):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for lang in LANGUAGES:
+            postings = self._postings[lang]
+            for _, text in _field_texts(doc, lang):
+                for term in tokenize(text, lang):
+                    matches = postings.get(term)
+                    if matches is None:
+                        continue
+                    matches.pop(product_id, None)
+                    if not matches:
+                        del postings[term]
+                        self._dirty[lang] = True
+
+    def _sorted_terms(self, lang: str) -> List[str]:
+        if self._dirty[lang]:
+            self._terms[lang] = sorted(self._postings[lang])
+            self._dirty[lang] = False
+        return self._terms[lang]
+
+    def completions(self, prefix: str, lang: str, limit: int = None) -> List[str]:
+        """Indexed terms starting with ``prefix`` (already normalized)"""
+        terms = self._sorted_terms(lang)
+        matches = []
+        for position in range(bisect_left(terms, prefix), len(terms)):
+            if not terms[position].startswith(prefix):
+                break
+            matches.append(terms[position])
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+    def _matches(self, term: str, lang: str, prefix: bool) -> Dict[str, int]:
+        postings = self._postings[lang]
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            return postings.get(term, {})
+        merged: Dict[str, int] = {}
+        for completion in self.completions(term, lang):
+            for product_id, weight in postings[completion].items():
+                if merged.get(product_id, 0) < weight:
+                    merged[product_id] = weight
+        return merged
+
+    def search(self, query: str, lang: str = DEFAULT_LANGUAGE, limit: int = 20, active_only: bool = True):
+        """
+        Products matching every query term, best first. The last term is matched as a
+        prefix so partial input finds results while the user is still typing.
+        Returns (documents, suggestions) where suggestions complete the last term.
+        """
+        terms = tokenize(query, lang)
+        if not terms:
+            return [], []
+
+        scores: Optional[Dict[str, int]] = None
+        for position, term in enumerate(terms):
+            matches = self._matches(term, lang, prefix=position == len(terms) - 1)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {pid: score + matches[pid] for pid, score in scores.items() if pid in matches}
+            if not scores:
+                break
+
+        docs = [self._docs[pid] for pid in scores or {}]
+        if active_only:
+            docs = [doc for doc in docs if doc.get("is_active", True)]
+        docs.sort(key=lambda doc: (-scores[doc["id"]], doc["id"]))
+        suggestions = self.completions(terms[-1], lang, limit=10) if len(terms[-1]) >= MIN_PREFIX_LENGTH else []
+        return docs[:limit], suggestions
+
+
+search_index = SearchIndex()
@@ -1,8 +1,11 @@
 """
 Seed initial data to database
 Run this script to populate the database with categories and initial products
+Use --synthetic to generate a large reproducible catalog instead (see synthetic_catalog.py)
 """
+import argparse
 import asyncio
+import sys
 from database import categories_collection, products_collection, db
 from datetime import datetime
 
@@ -819,12 +822,27 @@ async def seed_products():
     await products_collection.insert_many(products)
     print(f"✅ Seeded {len(products)} products")
 
-async def main():
+async def seed_synthetic(args):
+    """Fill the catalog (and the inbox, with --contacts) with a generated one"""
+    from synthetic_catalog import seed
+
+    print(f"🌱 Generating synthetic catalog (seed={args.seed})...")
+    try:
+        counts = await seed(db, args.categories, args.products, args.contacts, args.seed, args.batch_size, args.reset)
+    except ValueError as error:
+        sys.exit(f"❌ {error}; pass --reset to replace them")
+    for name, count in counts.items():
+        print(f"✅ Seeded {count} {name}")
+
+async def main(args):
     """Main seed function"""
     print("🌱 Starting database seed...")
     
-    await seed_categories()
-    await seed_products()
+    if args.synthetic:
+        await seed_synthetic(args)
+    else:
+        await seed_categories()
+        await seed_products()
     
     print("✅ Database seed completed successfully!")
     print("\n📊 Summary:")
@@ -834,5 +852,16 @@ async def main():
     print("   - Username: admin")
     print("   - Password: admin123")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the GOLD Vakum Sistemleri database")
+    parser.add_argument("--synthetic", action="store_true", help="generate a large synthetic catalog")
+    parser.add_argument("--categories", type=int, default=20, help="synthetic categories (default 20)")
+    parser.add_argument("--products", type=int, default=10000, help="synthetic products (default 10000)")
+    parser.add_argument("--contacts", type=int, default=1000, help="synthetic contact forms (default 1000)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed; same seed and counts give the same data")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many")
+    parser.add_argument("--reset", action="store_true", help="with --synthetic, empty collections that already hold documents first")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
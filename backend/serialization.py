@@ -0,0 +1,77 @@
+"""
+Fast JSON rendering for documents read back from MongoDB.
+Everything stored in the catalog and contact collections went through the
+validated Create/Update models on the way in, so by default reads trust the
+stored documents: models are built with ``model_construct`` and serialized in
+one pass by a cached ``TypeAdapter`` instead of being validated twice (once by
+``Model(**doc)`` and again by FastAPI's ``response_model``).
+Set TRUST_STORED_DOCUMENTS=false to re-validate every document on read.
+"""
+from fastapi.responses import Response
+from functools import lru_cache
+from pydantic import TypeAdapter
+from typing import Any, Dict, List
+import os
+import time
+
+import timing
+
+TRUST_STORED_DOCUMENTS = os.getenv("TRUST_STORED_DOCUMENTS", "true").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def build(model, doc: dict):
+    """Turn a stored document into a model instance, skipping validation in trusted mode"""
+    if TRUST_STORED_DOCUMENTS:
+        return model.model_construct(**doc)
+    return model(**doc)
+
+
+def render_list(model, docs: List[dict]) -> bytes:
+    """Serialize stored documents as a JSON array of ``model``"""
+    started = time.perf_counter()
+    models = [build(model, doc) for doc in docs]
+    built = time.perf_counter()
+    body = list_adapter(model).dump_json(models)
+    timing.add("validate", built - started)
+    timing.add("serialize", time.perf_counter() - built)
+    return body
+
+
+def render_one(model, doc: dict) -> bytes:
+    """Serialize a single stored document as ``model`` JSON"""
+    started = time.perf_counter()
+    instance = build(model, doc)
+    built = time.perf_counter()
+    body = instance.model_dump_json().encode()
+    timing.add("validate", built - started)
+    timing.add("serialize", time.perf_counter() - built)
+    return body
+
+
+_documents_adapter = TypeAdapter(List[Dict[str, Any]])
+_document_adapter = TypeAdapter(Dict[str, Any])
+
+
+def render_documents(docs: List[dict]) -> bytes:
+    """Serialize plain (already projected) documents as a JSON array"""
+    started = time.perf_counter()
+    body = _documents_adapter.dump_json(docs)
+    timing.add("serialize", time.perf_counter() - started)
+    return body
+
+
+def render_document(doc: dict) -> bytes:
+    started = time.perf_counter()
+    body = _document_adapter.dump_json(doc)
+    timing.add("serialize", time.perf_counter() - started)
+    return body
+
+
+def json_response(body: bytes, status_code: int = 200, headers: dict = None) -> Response:
+    """Wrap pre-rendered JSON bytes; FastAPI skips response_model validation for Response objects"""
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
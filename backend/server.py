@@ -1,14 +1,25 @@
-from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+import asyncio
 import os
+import time
 import logging
 from pathlib import Path
 
 # Import routes
-from routes import products, categories, contact, auth as auth_routes
-from database import init_db
+from routes import products, categories, contact, health, profiles, auth as auth_routes
+from database import MIN_POOL_SIZE, init_db, warm_up_pool
+import catalog_events
+from invalidation_bus import bus
+import snapshot
+from uploads import UPLOAD_DIR, UploadSizeLimitMiddleware, UploadsStaticFiles
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, metrics_endpoint
+from timing import ServerTimingMiddleware
+import contact_queue
+import hashing
+import images
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -29,14 +40,17 @@ api_router.include_router(auth_routes.router)
 api_router.include_router(categories.router)
 api_router.include_router(products.router)
 api_router.include_router(contact.router)
+api_router.include_router(profiles.router)
+api_router.include_router(health.router)
 
 # Include the router in the main app
 app.include_router(api_router)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 # Mount uploads directory
-uploads_dir = Path("/app/backend/uploads")
-uploads_dir.mkdir(exist_ok=True)
-app.mount("/api/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+app.mount("/api/uploads", UploadsStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -45,7 +59,11 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "Server-Timing", "X-Profile-Id"],
 )
+app.add_middleware(ServerTimingMiddleware)
+# Outermost, so request timings include compression and CORS handling
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -54,12 +72,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def prime_catalog_cache():
+    """Render what the storefront asks for first (active products, categories) into the catalog cache"""
+    request = Request({"type": "http", "method": "GET", "path": "/api/products/", "query_string": b"", "headers": []})
+    await products.get_products(
+        request, category_id=None, is_active=True, limit=None, after=None, lang=None, fields=None, spec=None
+    )
+    await categories.get_categories(request, lang=None, fields=None)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Starting GOLD Vakum Sistemleri API...")
-    await init_db()
-    logger.info("✅ Database initialized successfully")
+    started = time.perf_counter()
+    await asyncio.gather(init_db(), warm_up_pool())
+    logger.info(f"✅ Database initialized, connection pool warmed up ({max(MIN_POOL_SIZE, 1)} connections)")
+    # Listen before loading, so writes other workers make during the load are not missed
+    await bus.start()
+    await catalog_events.load_views()
+    logger.info(f"✅ Catalog snapshot built with {len(snapshot.current())} products")
+    await prime_catalog_cache()
+    app.state.catalog_refresh = asyncio.create_task(catalog_events.refresh_periodically())
+    contact_queue.start()
+    app.state.ready = True
+    logger.info(f"✅ Ready in {(time.perf_counter() - started) * 1000:.0f} ms")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info("👋 Shutting down GOLD Vakum Sistemleri API...")
\ No newline at end of file
+    logger.info("👋 Shutting down GOLD Vakum Sistemleri API...")
+    app.state.ready = False
+    app.state.catalog_refresh.cancel()
+    await bus.stop()
+    await contact_queue.stop()
+    logger.info(f"✅ Contact forms flushed ({contact_queue.stats['flushed']} written this run)")
+    hashing.shutdown()
+    images.shutdown()
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Read-only catalog snapshot.
+The whole catalog (categories and products) is small, changes rarely and is
+read constantly, so public GET routes serve it from an immutable in-process
+``CatalogSnapshot`` instead of MongoDB. Each admin write builds a new snapshot
+from the current one plus the written documents and swaps it in with a single
+assignment (see catalog_events.py), so readers always see one consistent
+version and keep working through a MongoDB outage.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+import logging
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Fields the snapshot orders and indexes on; documents without them are left out
+PRODUCT_KEYS = ("id", "category_id", "created_at")
+CATEGORY_KEYS = ("id", "slug")
+
+
+def _order(doc: dict) -> tuple:
+    return doc["created_at"], doc["id"]
+
+
+def _millis(value):
+    return value.replace(microsecond=value.microsecond // 1000 * 1000) if isinstance(value, datetime) else value
+
+
+def stored(doc: dict) -> dict:
+    """The document as a MongoDB read would return it: no _id, timestamps at millisecond precision"""
+    doc = {key: value for key, value in doc.items() if key != "_id"}
+    for key in ("created_at", "updated_at"):
+        if key in doc:
+            doc[key] = _millis(doc[key])
+    return doc
+
+
+def _complete(docs: Iterable[dict], keys: Tuple[str, ...], kind: str):
+    """``docs`` as stored(), skipping (and logging) the ones missing any of ``keys``"""
+    for doc in docs:
+        missing = [key for key in keys if doc.get(key) is None]
+        if missing:
+            logger.warning("Skipping %s %s without %s in the catalog snapshot", kind, doc.get("id", "?"), ", ".join(missing))
+            continue
+        yield stored(doc)
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the catalog. Products are kept in (created_at, id) order,
+    overall and per category, so keyset pages are a bisect plus a slice.
+    Documents are shared between snapshots and must never be mutated.
+    """
+
+    def __init__(self, products: Iterable[dict] = (), categories: Iterable[dict] = (), presorted: bool = False):
+        docs = list(products) if presorted else sorted(_complete(products, PRODUCT_KEYS, "product"), key=_order)
+        self.products: Tuple[dict, ...] = tuple(docs)
+        self._keys = [_order(doc) for doc in docs]
+        self.product_by_id = MappingProxyType({doc["id"]: doc for doc in docs})
+
+        by_category: Dict[str, List[dict]] = defaultdict(list)
+        for doc in docs:
+            by_category[doc["category_id"]].append(doc)
+        self._by_category = MappingProxyType({
+            category_id: (tuple(category_docs), [_order(doc) for doc in category_docs])
+            for category_id, category_docs in by_category.items()
+        })
+
+        self.categories: Tuple[dict, ...] = tuple(_complete(categories, CATEGORY_KEYS, "category"))
+        self.category_by_id = MappingProxyType({doc["id"]: doc for doc in self.categories})
+        self.category_by_slug = MappingProxyType({doc["slug"]: doc for doc in self.categories})
+
+    def __len__(self):
+        return len(self.products)
+
+    def with_products(self, saved: Iterable[dict] = (), deleted_ids: Iterable[str] = ()) -> "CatalogSnapshot":
+        """A new snapshot with ``saved`` products added or replaced and ``deleted_ids`` removed"""
+        saved = list(saved)
+        changed = {doc["id"] for doc in saved if doc.get("id") is not None} | set(deleted_ids)
+        saved = sorted(_complete(saved, PRODUCT_KEYS, "product"), key=_order)
+        kept = (doc for doc in self.products if doc["id"] not in changed)
+        return CatalogSnapshot(merge(kept, saved, key=_order), self.categories, presorted=True)
+
+    def with_category(self, saved: Optional[dict] = None, deleted_id: Optional[str] = None) -> "CatalogSnapshot":
+        categories = list(self.categories)
+        if saved is not None and next(_complete([saved], CATEGORY_KEYS, "category"), None) is None:
+            # Left out, as a full reload would leave it out
+            saved, deleted_id = None, saved.get("id")
+        if saved is not None:
+            saved = stored(saved)
+            positions = [i for i, doc in enumerate(categories) if doc["id"] == saved["id"]]
+            if positions:
+                categories[positions[0]] = saved
+            else:
+                categories.append(saved)
+        if deleted_id is not None:
+            categories = [doc for doc in categories if doc["id"] != deleted_id]
+        return CatalogSnapshot(self.products, categories, presorted=True)
+
+    def category(self, id_or_slug: str) -> Optional[dict]:
+        return self.category_by_id.get(id_or_slug) or self.category_by_slug.get(id_or_slug)
+
+    def select(
+        self,
+        category_id: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        specs: Optional[Dict[str, List[str]]] = None,
+        after: Optional[str] = None,
+    ):
+        """Products matching the listing filters in (created_at, id) order, starting after ``after``"""
+        if category_id:
+            docs, keys = self._by_category.get(category_id, ((), []))
+        else:
+            docs, keys = self.products, self._keys
+        # Decoded up front so a bad cursor fails before a streamed response starts
+        start = bisect_right(keys, decode_cursor(after)) if after else 0
+        return (
+            doc for doc in islice(docs, start, None)
+            if (is_active is None or doc.get("is_active") == is_active)
+            and (not specs or all(
+                str((doc.get("specs") or {}).get(key, "")).strip() in values for key, values in specs.items()
+            ))
+        )
+
+    def page(self, limit: Optional[int] = None, **filters):
+        """(documents, next_cursor) like pagination.fetch_page"""
+        docs = []
+        for doc in self.select(**filters):
+            docs.append(doc)
+            if limit is not None and len(docs) > limit:
+                return docs[:limit], encode_cursor(docs[limit - 1])
+        return docs, None
+
+
+_snapshot = CatalogSnapshot()
+
+
+def current() -> CatalogSnapshot:
+    return _snapshot
+
+
+def publish(snapshot: CatalogSnapshot):
+    global _snapshot
+    _snapshot = snapshot
@@ -0,0 +1,213 @@
+"""
+Synthetic catalog for scale and load testing.
+Generates N categories, M products and K contact forms with four-language
+text and realistic spec distributions. Output depends only on the seed and
+the counts, so a benchmark at 10k, 100k or 1M products can be reproduced
+exactly. Documents are generated lazily and inserted in batches.
+
+    python seed_data.py --synthetic --products 100000 --contacts 10000 --seed 42
+
+Existing data is only deleted with --reset; --contacts 0 leaves the inbox alone.
+"""
+from datetime import datetime, timedelta
+from typing import Iterator, List
+import random
+import uuid
+
+# Parallel vocabularies, one entry per language in tr/en/ar/ru order
+_LANGS = ("tr", "en", "ar", "ru")
+_PRODUCT_TYPES = [
+    ("Buhar Jeneratörü", "Steam Generator", "مولد البخار", "Парогенератор"),
+    ("Vakum Masası", "Vacuum Table", "طاولة الفراغ", "Вакуумный стол"),
+    ("Ütü Masası", "Ironing Table", "طاولة الكي", "Гладильный стол"),
+    ("Buhar Kazanı", "Steam Boiler", "غلاية البخار", "Паровой котел"),
+    ("Pres Makinası", "Press Machine", "آلة الكبس", "Пресс"),
+    ("Leke Çıkarma Ünitesi", "Spot Cleaning Unit", "وحدة إزالة البقع", "Пятновыводной стол"),
+    ("Cila Makinası", "Polishing Machine", "آلة التلميع", "Полировальная машина"),
+    ("Buhar Ütüsü", "Steam Iron", "مكواة بخار", "Паровой утюг"),
+]
+_SERIES = [
+    ("Profesyonel", "Professional", "احترافي", "Профессиональный"),
+    ("Endüstriyel", "Industrial", "صناعي", "Промышленный"),
+    ("Kompakt", "Compact", "مدمج", "Компактный"),
+    ("Otomatik", "Automatic", "أوتوماتيكي", "Автоматический"),
+    ("Çift Hazneli", "Twin Tank", "بخزانين", "Двухбаковый"),
+]
+_FEATURES = [
+    ("Paslanmaz çelik gövde", "Stainless steel body", "هيكل من الفولاذ المقاوم للصدأ", "Корпус из нержавеющей стали"),
+    ("Otomatik su besleme", "Automatic water feed", "تغذية مياه تلقائية", "Автоматическая подача воды"),
+    ("Dijital termostat", "Digital thermostat", "منظم حرارة رقمي", "Цифровой термостат"),
+    ("Düşük su alarmı", "Low water alarm", "إنذار انخفاض الماء", "Сигнал низкого уровня воды"),
+    ("Pedal kontrolü", "Pedal control", "تحكم بالدواسة", "Педальное управление"),
+    ("Güvenlik valfi", "Safety valve", "صمام أمان", "Предохранительный клапан"),
+    ("Enerji tasarruflu", "Energy efficient", "موفر للطاقة", "Энергосберегающий"),
+    ("CE sertifikalı", "CE certified", "معتمد من CE", "Сертифицирован CE"),
+    ("Sessiz çalışma", "Quiet operation", "تشغيل هادئ", "Тихая работа"),
+    ("Kolay bakım", "Easy maintenance", "صيانة سهلة", "Простое обслуживание"),
+]
+_DESCRIPTIONS = [
+    ("{name}, tekstil ve konfeksiyon atölyeleri için tasarlanmıştır.",
+     "{name} is designed for textile and garment workshops.",
+     "تم تصميم {name} لورش النسيج والملابس.",
+     "{name} предназначен для текстильных и швейных цехов."),
+    ("{name} ile kesintisiz buhar ve yüksek verim.",
+     "Continuous steam and high efficiency with {name}.",
+     "بخار مستمر وكفاءة عالية مع {name}.",
+     "Непрерывный пар и высокая производительность с {name}."),
+    ("Kuru temizleme ve ütü işletmeleri için güvenilir {name}.",
+     "A reliable {name} for dry cleaning and ironing businesses.",
+     "{name} موثوق لأعمال التنظيف الجاف والكي.",
+     "Надежный {name} для химчисток и гладильных мастерских."),
+]
+# Spec values with relative weights, roughly what a dealer catalog looks like
+_POWER = (["2 KW", "3.5 KW", "6 KW", "9 KW", "12 KW", "18 KW", "24 KW"], [6, 20, 25, 20, 14, 10, 5])
+_VOLTAGE = (["220V", "380V"], [60, 40])
+_FIRST_NAMES = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Ali", "Zeynep", "Omar", "Layla", "Ivan", "Olga", "John", "Maria"]
+_LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Haddad", "Nasser", "Ivanov", "Petrova", "Smith", "Garcia"]
+_COMPANIES = ["Tekstil A.Ş.", "Konfeksiyon Ltd.", "Kuru Temizleme", "Garment Co.", None, None]
+_MESSAGES = [
+    "Fiyat teklifi almak istiyorum.",
+    "Please send me a quote and delivery time.",
+    "أرغب في معرفة السعر ومدة التسليم.",
+    "Прошу прислать коммерческое предложение.",
+    "Yedek parça ve servis hakkında bilgi alabilir miyim?",
+]
+
+START = datetime(2023, 1, 1)
+
+
+def _rng(seed: int, stream: str) -> random.Random:
+    # One stream per collection, so changing one count leaves the other collections unchanged
+    return random.Random(f"{seed}:{stream}")
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _localized(parts: List[tuple], template: tuple = None) -> dict:
+    result = {}
+    for position, lang in enumerate(_LANGS):
+        # Arabic adjectives follow the noun
+        ordered = reversed(parts) if lang == "ar" else parts
+        text = " ".join(part[position] for part in ordered)
+        result[lang] = template[position].format(name=text) if template else text
+    return result
+
+
+def categories(count: int, seed: int = 0) -> List[dict]:
+    rng = _rng(seed, "categories")
+    docs = []
+    for i in range(count):
+        product_type = _PRODUCT_TYPES[i % len(_PRODUCT_TYPES)]
+        series = _SERIES[(i // len(_PRODUCT_TYPES)) % len(_SERIES)]
+        round_number = i // (len(_PRODUCT_TYPES) * len(_SERIES))
+        name = _localized([series, product_type])
+        if round_number:
+            name = {lang: f"{text} {round_number + 1}" for lang, text in name.items()}
+        docs.append({
+            "id": _uuid(rng),
+            "name": name,
+            "description": _localized([series, product_type], rng.choice(_DESCRIPTIONS)),
+            "slug": f"category-{i + 1}",
+            "image": None,
+            "created_at": START + timedelta(hours=i),
+        })
+    return docs
+
+
+def products(count: int, category_docs: List[dict], seed: int = 0) -> Iterator[dict]:
+    rng = _rng(seed, "products")
+    for i in range(count):
+        category = category_docs[rng.randrange(len(category_docs))]
+        product_type = rng.choice(_PRODUCT_TYPES)
+        series = rng.choice(_SERIES)
+        power = rng.choices(*_POWER)[0]
+        model = f"GOLD {power.split()[0]}-{i + 1}"
+        name = {lang: f"{model} {text}" for lang, text in _localized([series, product_type]).items()}
+        features = rng.sample(_FEATURES, rng.randint(3, 7))
+        width, depth = rng.randrange(40, 200, 5), rng.randrange(40, 120, 5)
+        created_at = START + timedelta(minutes=i)
+        yield {
+            "id": _uuid(rng),
+            "category_id": category["id"],
+            "name": name,
+            "description": _localized([series, product_type], rng.choice(_DESCRIPTIONS)),
+            "specs": {
+                "power": power,
+                "voltage": rng.choices(*_VOLTAGE)[0],
+                "dimensions": f"{width}x{depth}x{rng.randrange(80, 180, 5)} cm",
+                "weight": f"{rng.randint(8, 450)} kg",
+            },
+            "features": {lang: [feature[position] for feature in features] for position, lang in enumerate(_LANGS)},
+            "images": [f"https://example.com/products/{i + 1}/{n}.jpg" for n in range(rng.choice([0, 1, 1, 2, 3, 4]))],
+            "price": "Fiyat için iletişime geçin" if rng.random() < 0.8 else f"{rng.randrange(5000, 250000, 500)} TL",
+            "is_active": rng.random() >= 0.05,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(days=rng.randint(0, 90)),
+        }
+
+
+def contact_forms(count: int, product_ids: List[str], seed: int = 0) -> Iterator[dict]:
+    rng = _rng(seed, "contact_forms")
+    for i in range(count):
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        yield {
+            "id": _uuid(rng),
+            "name": f"{first} {last}",
+            "email": f"customer{i + 1}@example.com",
+            "phone": f"+90 5{rng.randint(30, 59)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+            "company": rng.choice(_COMPANIES),
+            "product_id": rng.choice(product_ids) if product_ids and rng.random() < 0.6 else None,
+            "message": rng.choice(_MESSAGES),
+            "is_read": rng.random() < 0.7,
+            "created_at": START + timedelta(minutes=7 * i),
+        }
+
+
+async def _insert_batched(collection, docs, batch_size: int) -> int:
+    batch, inserted = [], 0
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+
+async def seed(
+    db, category_count: int, product_count: int, contact_count: int, seed: int = 0, batch_size: int = 1000,
+    reset: bool = False,
+):
+    """
+    Fill the catalog in ``db`` with a synthetic one, and the inbox too when
+    ``contact_count`` is positive; returns inserted counts. Collections that
+    already hold documents are emptied first with ``reset``, otherwise a
+    ValueError names them and nothing is written.
+    """
+    names = ["categories", "products"] + (["contact_forms"] if contact_count > 0 else [])
+    occupied = [name for name in names if await db[name].find_one({}, {"_id": 1})]
+    if occupied and not reset:
+        raise ValueError(f"{', '.join(occupied)} already hold documents")
+    for name in occupied:
+        await db[name].delete_many({})
+
+    category_docs = categories(max(category_count, 1), seed)
+
+    await db.categories.insert_many([dict(doc) for doc in category_docs])
+    product_ids = []
+
+    def tracked_products():
+        for doc in products(product_count, category_docs, seed):
+            # Contact forms reference a sample of the generated products
+            if len(product_ids) < 1000:
+                product_ids.append(doc["id"])
+            yield doc
+
+    product_total = await _insert_batched(db.products, tracked_products(), batch_size)
+    contact_total = await _insert_batched(db.contact_forms, contact_forms(contact_count, product_ids, seed), batch_size)
+    return {"categories": len(category_docs), "products": product_total, "contact_forms": contact_total}
@@ -0,0 +1,193 @@
+"""
+Per-request Server-Timing breakdown and an opt-in sampling profiler.
+``ServerTimingMiddleware`` keeps a ``Timings`` object in a context variable for
+the duration of each request. Instrumented code adds to it:
+- db: MongoDB command time reported by the driver (metrics.CommandMetrics),
+- validate: building and validating response models (serialization.py),
+- serialize: JSON encoding,
+and the response carries them with the time to the first response byte:
+
+    Server-Timing: db;dur=1.84, validate;dur=0.41, serialize;dur=0.22, total;dur=3.05
+
+An admin can add ``X-Profile: 1`` (or ``?profile=1``) to a request to sample
+the event loop thread's stacks every PROFILE_INTERVAL_MS while it runs. The
+samples are stored as folded stacks (flamegraph.pl, speedscope) under
+PROFILE_DIR and the response names them in ``X-Profile-Id``; fetch them from
+/api/profiles/{id}. Only the newest PROFILE_MAX_FILES are kept. The sampler
+sees the whole event loop, so profile on a quiet worker.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+PHASES = ("db", "validate", "serialize")
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "gold-profiles")))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_ID_PATTERN = "^[0-9a-f]{32}$"
+
+
+class Timings:
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    def header(self, total: float) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_timings: ContextVar[Optional[Timings]] = ContextVar("timings", default=None)
+
+
+def add(phase: str, seconds: float):
+    """Charge ``seconds`` to ``phase`` of the current request, if any"""
+    timings = _timings.get()
+    if timings is not None:
+        # Driver threads may add db time concurrently; a rare lost update only skews a diagnostic
+        timings.phases[phase] += seconds
+
+
+class Sampler(threading.Thread):
+    """Collect folded stacks of one thread until stopped"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._done.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def profile_path(profile_id: str) -> Path:
+    return PROFILE_DIR / f"{profile_id}.folded"
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def save_profile(profile_id: str, stacks: Counter):
+    """
+    Write ``stacks`` in the folded format: one ``frame;frame;frame count`` line
+    per stack, then delete the oldest profiles beyond PROFILE_MAX_FILES
+    """
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_path(profile_id).write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+    # Other workers sharing PROFILE_DIR may be deleting the same files
+    profiles = sorted(PROFILE_DIR.glob("*.folded"), key=_mtime, reverse=True)
+    for path in profiles[PROFILE_MAX_FILES:]:
+        path.unlink(missing_ok=True)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _wants_profile(scope) -> bool:
+    if _header(scope, b"x-profile") in (b"1", b"true"):
+        return True
+    query = scope.get("query_string", b"")
+    return b"profile" in query and parse_qs(query.decode("latin-1")).get("profile", [""])[-1] in ("1", "true")
+
+
+async def _is_admin(scope) -> bool:
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+    from auth import get_current_admin
+
+    authorization = (_header(scope, b"authorization") or b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        await get_current_admin(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+    except HTTPException:
+        return False
+    except Exception:
+        # The request itself may not need the database; serve it unprofiled
+        logger.warning("Could not check the profiling admin; not profiling", exc_info=True)
+        return False
+    return True
+
+
+class ServerTimingMiddleware:
+    """Add Server-Timing to every response; run the sampling profiler for admins who ask for it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SERVER_TIMING:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        timings = Timings()
+        token = _timings.set(timings)
+        sampler = profile_id = None
+        if _wants_profile(scope) and await _is_admin(scope):
+            profile_id = uuid.uuid4().hex
+            sampler = Sampler(threading.get_ident())
+            sampler.start()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header(time.perf_counter() - started).encode()))
+                if sampler is not None:
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            if sampler is not None:
+                stacks = sampler.stop()
+                try:
+                    await run_in_threadpool(save_profile, profile_id, stacks)
+                except OSError:
+                    logger.warning("Could not save profile %s", profile_id, exc_info=True)
+                else:
+                    logger.info("Profiled %s %s: %d samples in %s", scope["method"], scope["path"], sum(stacks.values()), profile_id)
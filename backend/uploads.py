@@ -0,0 +1,228 @@
+"""
+Upload storage and serving.
+Files are streamed to disk in chunks while being hashed, and stored under
+their SHA-256 so uploading the same photo twice costs no extra disk. Since a
+stored name never changes content, ``UploadsStaticFiles`` serves them with
+far-future immutable caching, byte ranges and precompressed sidecars.
+"""
+from email.utils import formatdate
+from fastapi import UploadFile
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+import anyio
+import hashlib
+import mimetypes
+import os
+import stat
+import tempfile
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "/app/backend/uploads"))
+UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOADS_URL = "/api/uploads"
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+CHUNK_SIZE = 256 * 1024
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+IMAGE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def upload_url(filename: str) -> str:
+    return f"{UPLOADS_URL}/{filename}"
+
+
+async def store_upload(file: UploadFile, extension: str):
+    """Stream ``file`` into UPLOAD_DIR under its content hash; return (filename, already_stored)"""
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise UploadTooLarge()
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        target = UPLOAD_DIR / filename
+        if target.exists():
+            os.unlink(tmp_path)
+            return filename, True
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+        return filename, False
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class UploadSizeLimitMiddleware:
+    """Reject oversized image uploads from their Content-Length before the body is read"""
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"].rstrip("/").endswith("/images"):
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        response = JSONResponse({"detail": "Upload too large"}, status_code=413)
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Precompressed sidecars (<file>.br, <file>.gz) in order of preference
+SIDECAR_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class UploadFileResponse(Response):
+    """
+    Send a byte range of a file. Uses the ASGI zero-copy send extension when
+    the server offers it and reads the file in chunks off the event loop otherwise.
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: dict):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.background = None
+        self.body = b""
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start
+        if scope["method"] == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def parse_range(header: str, size: int):
+    """(start, end) for a single ``bytes=`` range, None to ignore the header, or ValueError if unsatisfiable"""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        # Multipart ranges are rarely used for media; serving the full body is allowed
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+        else:
+            start = int(first)
+            end = int(last) + 1 if last else size
+    except ValueError:
+        return None
+    if first == "":
+        # A suffix of the last ``length`` bytes; nothing to send for -0 or an empty file
+        if length <= 0 or size == 0:
+            raise ValueError()
+        return max(0, size - length), size
+    if start >= size or end <= start:
+        raise ValueError()
+    return start, min(end, size)
+
+
+class UploadsStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed uploads: immutable caching, Range and precompressed sidecars"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        path = str(full_path)
+        if os.path.basename(path).startswith("."):
+            # Partial uploads in progress are never served
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+
+        request_headers = Headers(scope=scope)
+        etag_base = hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode(), usedforsecurity=False).hexdigest()
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        headers = {
+            "accept-ranges": "bytes",
+            "cache-control": IMMUTABLE_CACHE_CONTROL,
+            "content-type": media_type,
+            "etag": f'"{etag_base}"',
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "vary": "Accept-Encoding",
+        }
+        if self.is_not_modified(Headers(headers), request_headers):
+            return NotModifiedResponse(Headers(headers))
+
+        size = stat_result.st_size
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range == headers["etag"]):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+            if byte_range is not None:
+                start, end = byte_range
+                headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+                headers["content-length"] = str(end - start)
+                return UploadFileResponse(path, start, end, 206, headers)
+
+        if not range_header:
+            accept_encoding = request_headers.get("accept-encoding", "")
+            for encoding, suffix in SIDECAR_ENCODINGS:
+                if encoding not in accept_encoding:
+                    continue
+                try:
+                    sidecar = os.stat(path + suffix)
+                except OSError:
+                    continue
+                if stat.S_ISREG(sidecar.st_mode):
+                    headers["content-encoding"] = encoding
+                    headers["etag"] = f'"{etag_base}-{encoding}"'
+                    headers["content-length"] = str(sidecar.st_size)
+                    return UploadFileResponse(path + suffix, 0, sidecar.st_size, status_code, headers)
+
+        headers["content-length"] = str(size)
+        return UploadFileResponse(path, 0, size, status_code, headers)
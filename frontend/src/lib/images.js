@@ -0,0 +1,19 @@
+// Pick resized variants of a product image produced by the backend image pipeline.
+// product.image_variants maps the stored file name (without extension) to
+// { "<width>": { "<format>": url } }; external images have no variants.
+const stemOf = (url) => url.split('/').pop().replace(/\.[^.]+$/, '');
+
+export function productImageProps(product, index = 0, format = 'webp') {
+  const src = product.images?.[index];
+  const variants = src && product.image_variants?.[stemOf(src)];
+  if (!variants) {
+    return { src };
+  }
+
+  const widths = Object.keys(variants).map(Number).sort((a, b) => a - b);
+  const srcSet = widths
+    .filter((width) => variants[width][format])
+    .map((width) => `${variants[width][format]} ${width}w`)
+    .join(', ');
+  return srcSet ? { src, srcSet } : { src };
+}
@@ -4,6 +4,7 @@ import { Filter } from 'lucide-react';
 import { useLanguage } from '../context/LanguageContext';
 import { translations } from '../mockData';
 import { productsAPI, categoriesAPI } from '../services/api';
+import { productImageProps } from '../lib/images';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
 
@@ -108,7 +109,9 @@ const Products = () => {
             <Card key={product.id} className="group overflow-hidden hover:shadow-2xl transition-all duration-300 border-2 hover:border-blue-600">
               <div className="relative aspect-[4/3] overflow-hidden bg-gray-100">
                 <img
-                  src={product.images[0]}
+                  {...productImageProps(product)}
+                  sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                  loading="lazy"
                   alt={product.name[language]}
                   className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-500"
                 />
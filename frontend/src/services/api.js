@@ -48,8 +48,12 @@ export const productsAPI = {
 export const contactAPI = {
   submit: (data) => api.post('/contact/', data),
   getAll: (params) => api.get('/contact/', { params }),
+  getCounts: () => api.get('/contact/counts'),
+  getSummaries: (params) => api.get('/contact/summaries', { params }),
   markRead: (id) => api.put(`/contact/${id}/mark-read/`),
+  markReadMany: (ids) => api.put('/contact/mark-read', { ids }),
   delete: (id) => api.delete(`/contact/${id}/`),
+  deleteMany: (ids) => api.post('/contact/delete', { ids }),
 };
 
 // Auth API
@@ -0,0 +1,29 @@
+"""
+The backend modules import each other by their plain names (``import database``)
+and read their configuration at import, so the backend directory goes on the
+path and the settings get test defaults before any test module imports them.
+Nothing here connects to MongoDB: Motor only connects on the first operation,
+and tests that need a database get the in-process stand-in from ``mock_db``.
+"""
+from pathlib import Path
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "gold_test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="gold-uploads-"))
+
+
+@pytest.fixture
+def mock_db():
+    """A fresh in-process MongoDB stand-in database"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()["gold_test"]
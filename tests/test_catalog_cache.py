@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import cache
+import catalog_events
+import snapshot
+from cache import catalog_last_changed
+from invalidation_bus import DOC_ID, bus
+
+UPDATED = datetime(2024, 3, 1, 12, 0, 0)
+DELETED = datetime(2024, 3, 2, 8, 30, 0)
+
+
+@pytest.fixture
+def catalog(mock_db, monkeypatch):
+    """catalog_events and the bus on the stand-in database, leaving the shared views as they were"""
+    monkeypatch.setattr(catalog_events, "products_collection", mock_db["products"])
+    monkeypatch.setattr(catalog_events, "categories_collection", mock_db["categories"])
+    monkeypatch.setattr(catalog_events, "loaded_at", None)
+    monkeypatch.setattr(bus, "collection", mock_db["invalidations"])
+    monkeypatch.setattr(cache, "_catalog_changed_at", None)
+    previous = snapshot.current()
+    asyncio.run(mock_db["products"].insert_one(
+        {"id": "p1", "category_id": "steam", "created_at": datetime(2024, 1, 1), "updated_at": UPDATED}
+    ))
+    yield mock_db
+    snapshot.publish(previous)
+    catalog_events.search_index.rebuild(previous.products)
+    catalog_events.facet_index.rebuild(previous.products)
+    cache.catalog_cache.invalidate()
+
+
+def test_last_modified_floor_is_the_newest_document_after_a_load(catalog):
+    asyncio.run(catalog_events.load_views())
+    assert catalog_last_changed() == UPDATED
+
+
+def test_last_modified_floor_includes_deletions_announced_on_the_bus(catalog):
+    asyncio.run(catalog["invalidations"].insert_one({"_id": DOC_ID, "version": 1, "changes": [
+        {"kind": "products", "keys": ["gone"], "worker": "other", "at": DELETED.replace(tzinfo=timezone.utc).timestamp()},
+    ]}))
+    # Any worker loading this data, at any time, reports the same floor
+    asyncio.run(catalog_events.load_views())
+    assert catalog_last_changed() == DELETED
+
+
+def test_product_writes_drop_only_the_listings_they_can_affect():
+    keep = [("products", "vacuum", None, 50, None, None, None, None), ("categories", None, None), ("product", "p2", None, None)]
+    drop = [("products", "steam", None, 50, None, None, None, None), ("products", None, True, 50, None, None, None, None),
+            ("product", "p1", None, None)]
+    for key in keep + drop:
+        cache.catalog_cache.set(key, "body")
+    cache.invalidate_products("steam", product_ids=["p1"])
+    assert [key for key in keep + drop if cache.catalog_cache.get(key) is not None] == keep
+    cache.catalog_cache.invalidate()
+
+
+def test_category_writes_drop_category_listings_and_that_category():
+    keys = [("categories", None, None), ("category", "steam", None, None), ("category", "vacuum", None, None)]
+    for key in keys:
+        cache.catalog_cache.set(key, "body")
+    cache.invalidate_categories("steam")
+    assert [key for key in keys if cache.catalog_cache.get(key) is not None] == [("category", "vacuum", None, None)]
+    cache.catalog_cache.invalidate()
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    ttl_cache = cache.TTLCache(maxsize=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.set("c", 3)
+    assert ttl_cache.get("a") is None and ttl_cache.get("b") == 2
+    now[0] += 11
+    assert ttl_cache.get("c") is None
+    assert (ttl_cache.hits, ttl_cache.misses) == (1, 2)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from cache import catalog_cache
+from routes import categories, products
+import cache
+import catalog_events
+import snapshot
+
+START = datetime(2024, 1, 1)
+
+
+def _product(i: int, category_id: str = "steam", **extra) -> dict:
+    return {
+        "id": f"p{i:02d}",
+        "category_id": category_id,
+        "name": {"tr": f"Ürün {i}", "en": f"Product {i}"},
+        "description": {"tr": "Açıklama"},
+        "specs": {"voltage": "220V"},
+        "features": {"tr": []},
+        "is_active": True,
+        "created_at": START + timedelta(minutes=i),
+        "updated_at": START + timedelta(minutes=i),
+        **extra,
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """The catalog read routes over a snapshot built here; no database is involved"""
+    monkeypatch.setattr(cache, "_catalog_changed_at", None)
+    previous = snapshot.current()
+    snapshot.publish(snapshot.CatalogSnapshot(
+        [_product(i) for i in range(5)],
+        [{"id": "steam", "slug": "steam-generator", "name": {"tr": "Buhar"}, "description": {}, "created_at": START}],
+    ))
+    catalog_cache.invalidate()
+    app = FastAPI()
+    app.include_router(products.router, prefix="/api")
+    app.include_router(categories.router, prefix="/api")
+    yield TestClient(app)
+    snapshot.publish(previous)
+    catalog_events.search_index.rebuild(previous.products)
+    catalog_events.facet_index.rebuild(previous.products)
+    catalog_cache.invalidate()
+
+
+def test_next_link_is_built_for_each_request(client):
+    first = client.get("/api/products/?limit=2", headers={"Host": "shop.example"})
+    assert first.headers["link"].startswith("<http://shop.example/api/products/?limit=2&after=")
+
+    # Served from the cache, but linked from this request's own host
+    second = client.get("/api/products/?limit=2", headers={"Host": "mirror.example"})
+    assert second.json() == first.json()
+    assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+    assert second.headers["link"].startswith("<http://mirror.example/api/products/?limit=2&after=")
+    assert catalog_cache.hits >= 1
+
+
+def test_last_page_has_no_next_link(client):
+    cursor = client.get("/api/products/?limit=3").headers["x-next-cursor"]
+    last = client.get("/api/products/", params={"limit": 3, "after": cursor})
+    assert [doc["id"] for doc in last.json()] == ["p03", "p04"]
+    assert "link" not in last.headers and "x-next-cursor" not in last.headers
+
+
+def test_revalidation_is_answered_with_304_until_the_catalog_changes(client):
+    first = client.get("/api/products/?category_id=steam")
+    etag, modified = first.headers["etag"], first.headers["last-modified"]
+    assert client.get("/api/products/?category_id=steam", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/products/?category_id=steam", headers={"If-Modified-Since": modified}).status_code == 304
+
+    catalog_events.product_saved(_product(9, name={"tr": "Yeni"}, updated_at=START + timedelta(days=1)))
+    changed = client.get("/api/products/?category_id=steam", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[-1]["name"]["tr"] == "Yeni"
+
+
+def test_deleting_the_newest_product_does_not_move_last_modified_back(client):
+    modified = client.get("/api/products/").headers["last-modified"]
+    catalog_events.product_deleted(snapshot.current().product_by_id["p04"])
+    # The newest remaining product is older, but the deletion itself moved the floor
+    listing = client.get("/api/products/", headers={"If-Modified-Since": modified})
+    assert listing.status_code == 200
+    assert [doc["id"] for doc in listing.json()] == ["p00", "p01", "p02", "p03"]
+    assert parsedate_to_datetime(listing.headers["last-modified"]) > parsedate_to_datetime(modified)
@@ -0,0 +1,29 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth import get_current_admin
+from routes import products
+
+
+def test_update_of_a_product_deleted_meanwhile_is_404(mock_db, monkeypatch):
+    collection = mock_db["products"]
+    asyncio.run(collection.insert_one({"id": "p1", "category_id": "steam", "name": {"tr": "Ürün"}}))
+    find_one_and_update = collection.find_one_and_update
+
+    async def deleted_first(*args, **kwargs):
+        # Another admin deletes the product between the existence check and the update
+        await collection.delete_one({"id": "p1"})
+        return await find_one_and_update(*args, **kwargs)
+
+    monkeypatch.setattr(collection, "find_one_and_update", deleted_first)
+    monkeypatch.setattr(products, "products_collection", collection)
+    app = FastAPI()
+    app.include_router(products.router, prefix="/api")
+    app.dependency_overrides[get_current_admin] = lambda: {"username": "admin"}
+
+    with TestClient(app) as client:
+        response = client.put("/api/products/p1", json={"price": "100 TL"})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Product not found"}
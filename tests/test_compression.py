@@ -0,0 +1,79 @@
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import compression
+from compression import CompressionMiddleware, negotiate
+
+ROWS = [{"id": i, "name": "Buhar Jeneratörü", "power": "6 KW"} for i in range(200)]
+
+
+def _app():
+    async def large(request):
+        return JSONResponse(ROWS, headers={"ETag": '"abc"'})
+
+    async def small(request):
+        return JSONResponse({"status": "ok"})
+
+    async def stream(request):
+        async def lines():
+            for row in ROWS:
+                yield json.dumps(row).encode() + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def image(request):
+        return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    async def encoded(request):
+        return Response(gzip.compress(b"{}" * 1000), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    app = Starlette(routes=[Route(f"/{handler.__name__}", handler) for handler in (large, small, stream, image, encoded)])
+    app.add_middleware(CompressionMiddleware)
+    return app
+
+
+@pytest.fixture
+def client():
+    return TestClient(_app())
+
+
+def test_negotiation_prefers_brotli_and_honours_q_values():
+    assert negotiate("") is None
+    assert negotiate("gzip, br") == ("br" if compression.brotli else "gzip")
+    assert negotiate("br;q=0, gzip;q=0.5") == "gzip"
+    assert negotiate("identity") is None
+    assert negotiate("*;q=0") is None
+
+
+def test_large_json_is_gzipped_with_a_weak_etag(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(json.dumps(ROWS))
+    assert response.json() == ROWS
+
+
+def test_streamed_ndjson_is_compressed_incrementally(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == ROWS
+
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/encoded"])
+def test_small_binary_and_encoded_responses_pass_through(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get("content-encoding") == ("gzip" if path == "/encoded" else None)
+    assert "vary" not in response.headers
+
+
+def test_identity_clients_get_the_body_unchanged(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import contact_queue
+from contact_queue import ContactQueueFull
+
+
+@pytest.fixture
+def queue(mock_db, monkeypatch):
+    """The write-behind queue on the stand-in database, with fresh stats and small batches"""
+    monkeypatch.setattr(contact_queue, "contact_forms_collection", mock_db["contact_forms"])
+    monkeypatch.setattr(contact_queue, "stats", {key: 0 for key in contact_queue.stats})
+    monkeypatch.setattr(contact_queue, "BATCH_SIZE", 3)
+    monkeypatch.setattr(contact_queue, "FLUSH_INTERVAL", 0.01)
+    return mock_db["contact_forms"]
+
+
+def _form(i):
+    return {"id": f"c{i}", "name": "Ayşe", "message": f"Mesaj {i}"}
+
+
+def test_submissions_are_written_in_batches(queue):
+    async def scenario():
+        contact_queue.start()
+        for i in range(5):
+            contact_queue.submit(_form(i))
+        while contact_queue.stats["flushed"] < 5:
+            await asyncio.sleep(0.01)
+        stored = await queue.count_documents({})
+        await contact_queue.stop()
+        return stored
+
+    assert asyncio.run(scenario()) == 5
+    assert contact_queue.stats["flushes"] == 2
+    assert contact_queue.stats["accepted"] == 5
+
+
+def test_stop_drains_the_queue_and_refuses_new_submissions(queue):
+    async def scenario():
+        contact_queue.start()
+        for i in range(7):
+            contact_queue.submit(_form(i))
+        # Nothing has been written yet: the writer has not run
+        await contact_queue.stop()
+        with pytest.raises(ContactQueueFull):
+            contact_queue.submit(_form(99))
+        return sorted(doc["id"] for doc in await queue.find({}, {"_id": 0, "id": 1}).to_list(None))
+
+    assert asyncio.run(scenario()) == [f"c{i}" for i in range(7)]
+    assert contact_queue.stats["rejected"] == 1
+    assert contact_queue.stats["lost"] == 0
+
+
+def test_submissions_are_logged_when_the_database_stays_down_through_shutdown(queue, monkeypatch, caplog):
+    async def failing(batch):
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(contact_queue, "_insert", failing)
+    monkeypatch.setattr(contact_queue, "SHUTDOWN_TIMEOUT", 0.2)
+
+    async def scenario():
+        contact_queue.start()
+        contact_queue.submit(_form(1))
+        await contact_queue.stop()
+
+    asyncio.run(scenario())
+    assert contact_queue.stats["lost"] == 1
+    assert contact_queue.stats["flush_failures"] >= 1
+    assert "Unsaved contact form" in caplog.text and "Mesaj 1" in caplog.text
+
+
+def test_a_full_queue_rejects_submissions(queue, monkeypatch):
+    monkeypatch.setattr(contact_queue, "QUEUE_SIZE", 2)
+
+    async def scenario():
+        contact_queue.start()
+        contact_queue.submit(_form(1))
+        contact_queue.submit(_form(2))
+        with pytest.raises(ContactQueueFull):
+            contact_queue.submit(_form(3))
+        await contact_queue.stop()
+
+    asyncio.run(scenario())
+    assert (contact_queue.stats["accepted"], contact_queue.stats["rejected"]) == (2, 1)
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import HTTPException
+
+from facets import FacetIndex, parse_spec_filter
+
+
+def _product(product_id, category_id, is_active=True, **specs):
+    return {"id": product_id, "category_id": category_id, "is_active": is_active, "specs": specs}
+
+
+@pytest.fixture
+def index():
+    index = FacetIndex()
+    index.rebuild([
+        _product("a", "steam", voltage="220V", power="3 KW"),
+        _product("b", "steam", voltage="380V", power="6 KW"),
+        _product("c", "vacuum", voltage="220V"),
+        _product("off", "steam", is_active=False, voltage="220V"),
+    ])
+    return index
+
+
+def test_counts_only_active_products(index):
+    total, counts = index.facets()
+    assert total == 3
+    assert counts == {"power": {"3 KW": 1, "6 KW": 1}, "voltage": {"220V": 2, "380V": 1}}
+    assert index.facets("steam") == (2, {"power": {"3 KW": 1, "6 KW": 1}, "voltage": {"220V": 1, "380V": 1}})
+
+
+def test_deactivating_a_product_removes_its_counts(index):
+    index.add(_product("b", "steam", is_active=False, voltage="380V", power="6 KW"))
+    assert index.facets() == (2, {"power": {"3 KW": 1}, "voltage": {"220V": 2}})
+    assert index.facets("steam") == (1, {"power": {"3 KW": 1}, "voltage": {"220V": 1}})
+
+
+def test_deleting_a_product_removes_its_counts(index):
+    index.remove("c")
+    assert index.facets() == (2, {"power": {"3 KW": 1, "6 KW": 1}, "voltage": {"220V": 1, "380V": 1}})
+    assert index.facets("vacuum") == (0, {})
+    index.remove("c")
+    assert len(index) == 2
+
+
+def test_updating_specs_moves_counts(index):
+    index.add(_product("a", "vacuum", voltage="380V"))
+    assert index.facets("vacuum") == (2, {"voltage": {"220V": 1, "380V": 1}})
+    assert index.facets("steam") == (1, {"power": {"6 KW": 1}, "voltage": {"380V": 1}})
+
+
+def test_selected_key_counts_ignore_their_own_selection(index):
+    total, counts = index.facets(selected={"voltage": ["220V"]})
+    assert total == 2
+    assert counts == {"power": {"3 KW": 1}, "voltage": {"220V": 2, "380V": 1}}
+
+
+def test_selected_value_without_products_is_reported_as_zero(index):
+    assert index.facets(selected={"voltage": ["110V"]}) == (0, {"voltage": {"110V": 0, "220V": 2, "380V": 1}})
+
+
+def test_parse_spec_filter():
+    assert parse_spec_filter(["voltage:380V", "power: 6 KW", "voltage:220V", "voltage:380V"]) == {
+        "power": ["6 KW"],
+        "voltage": ["220V", "380V"],
+    }
+    for bad in ("voltage", "voltage:", ":220V", "$where:1", "a.b:1"):
+        with pytest.raises(HTTPException):
+            parse_spec_filter([bad])
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth import get_current_admin
+from routes import contact
+
+
+@pytest.fixture
+def inbox(mock_db, monkeypatch):
+    """The contact routes on the stand-in database with five forms, c0 and c1 already read"""
+    collection = mock_db["contact_forms"]
+    asyncio.run(collection.insert_many([
+        {
+            "id": f"c{i}", "name": "Ayşe Yılmaz", "email": "ayse@example.com", "phone": "+90 532 000 0000",
+            "message": f"Mesaj {i}", "is_read": i < 2, "created_at": datetime(2024, 1, 1) + timedelta(hours=i),
+        }
+        for i in range(5)
+    ]))
+    monkeypatch.setattr(contact, "contact_forms_collection", collection)
+    app = FastAPI()
+    app.include_router(contact.router, prefix="/api")
+    app.dependency_overrides[get_current_admin] = lambda: {"username": "admin"}
+    return TestClient(app), collection
+
+
+def test_bulk_mark_read_only_counts_forms_that_were_unread(inbox):
+    client, collection = inbox
+    response = client.put("/api/contact/mark-read", json={"ids": ["c0", "c2", "c3", "missing"]})
+    assert response.json()["modified"] == 2
+    assert client.get("/api/contact/counts").json() == {"total": 5, "unread": 1}
+    unread = asyncio.run(collection.find({"is_read": False}).to_list(None))
+    assert [doc["id"] for doc in unread] == ["c4"]
+
+
+def test_bulk_delete_removes_only_the_selected_forms(inbox):
+    client, collection = inbox
+    response = client.post("/api/contact/delete", json={"ids": ["c1", "c4", "missing"]})
+    assert response.json()["deleted"] == 2
+    assert client.get("/api/contact/counts").json() == {"total": 3, "unread": 2}
+
+
+@pytest.mark.parametrize("ids", [[], [f"c{i}" for i in range(1001)]])
+def test_bulk_selections_are_bounded(inbox, ids):
+    client, _ = inbox
+    assert client.put("/api/contact/mark-read", json={"ids": ids}).status_code == 422
+    assert client.post("/api/contact/delete", json={"ids": ids}).status_code == 422
+
+
+def test_summaries_leave_out_the_message_and_page_newest_first(inbox):
+    client, _ = inbox
+    first = client.get("/api/contact/summaries?limit=2&is_read=false")
+    assert [row["id"] for row in first.json()] == ["c4", "c3"]
+    assert all("message" not in row for row in first.json())
+    rest = client.get("/api/contact/summaries", params={"limit": 2, "is_read": "false", "after": first.headers["x-next-cursor"]})
+    assert [row["id"] for row in rest.json()] == ["c2"]
+    assert "x-next-cursor" not in rest.headers
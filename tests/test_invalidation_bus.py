@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+import invalidation_bus
+from invalidation_bus import DOC_ID, InvalidationBus
+
+
+class Recorder:
+    def __init__(self, bus: InvalidationBus, kind: str = "products"):
+        self.calls = []
+        bus.subscribe(kind, self)
+
+    async def __call__(self, keys, at):
+        self.calls.append(keys)
+
+
+def _workers(collection, count=2):
+    buses = [InvalidationBus(collection, worker=f"worker-{i}") for i in range(count)]
+    return buses, [Recorder(bus) for bus in buses]
+
+
+async def _announce(bus: InvalidationBus, *changes):
+    for keys in changes:
+        bus.announce("products", keys)
+    # stop() waits for the pending announcements
+    await bus.stop()
+
+
+def test_changes_from_other_workers_are_applied_once_in_order(mock_db):
+    async def scenario():
+        (writer, reader), (own, seen) = _workers(mock_db["invalidations"])
+        await _announce(writer, ["p1"], ["p2", "p3"])
+        await reader.sync()
+        await writer.sync()
+        await reader.sync()
+        return writer, reader, own, seen
+
+    writer, reader, own, seen = asyncio.run(scenario())
+    assert seen.calls in ([["p1"], ["p2", "p3"]], [["p2", "p3"], ["p1"]])
+    # A worker has already applied its own writes
+    assert own.calls == []
+    assert reader.version == writer.version == 2
+    assert reader.stats["applied"] == 2
+
+
+def test_only_changes_newer_than_the_seen_version_are_applied(mock_db):
+    async def scenario():
+        (writer, reader), (_, seen) = _workers(mock_db["invalidations"])
+        await _announce(writer, ["p1"])
+        await reader.sync()
+        await _announce(writer, ["p2"])
+        await reader.sync()
+        return seen
+
+    assert asyncio.run(scenario()).calls == [["p1"], ["p2"]]
+
+
+def test_falling_behind_the_log_rebuilds_everything(mock_db, monkeypatch):
+    monkeypatch.setattr(invalidation_bus, "LOG_SIZE", 2)
+
+    async def scenario():
+        (writer, reader), (_, seen) = _workers(mock_db["invalidations"])
+        for i in range(5):
+            await _announce(writer, [f"p{i}"])
+        doc = await mock_db["invalidations"].find_one({"_id": DOC_ID})
+        await reader.sync()
+        return doc, reader, seen
+
+    doc, reader, seen = asyncio.run(scenario())
+    assert doc["version"] == 5 and len(doc["changes"]) == 2
+    assert seen.calls == [None]
+    assert (reader.version, reader.stats["resyncs"]) == (5, 1)
+
+
+def test_log_at_its_limit_is_still_replayed(mock_db, monkeypatch):
+    monkeypatch.setattr(invalidation_bus, "LOG_SIZE", 2)
+
+    async def scenario():
+        (writer, reader), (_, seen) = _workers(mock_db["invalidations"])
+        await _announce(writer, ["p0"])
+        await reader.sync()
+        await _announce(writer, ["p1"])
+        await _announce(writer, ["p2"])
+        await reader.sync()
+        return reader, seen
+
+    reader, seen = asyncio.run(scenario())
+    assert seen.calls == [["p0"], ["p1"], ["p2"]]
+    assert reader.stats["resyncs"] == 0
+
+
+def test_reset_log_rebuilds_everything(mock_db):
+    async def scenario():
+        (writer, reader), (_, seen) = _workers(mock_db["invalidations"])
+        await _announce(writer, ["p1"], ["p2"])
+        await reader.sync()
+        await mock_db["invalidations"].delete_many({})
+        await _announce(writer, ["p3"])
+        await reader.sync()
+        return reader, seen
+
+    reader, seen = asyncio.run(scenario())
+    assert seen.calls[-1] is None
+    assert reader.version == 1
+
+
+@pytest.mark.parametrize("kind, keys", [("products", None), ("admins", ["admin"])])
+def test_handlers_only_receive_their_kind(mock_db, kind, keys):
+    async def scenario():
+        writer = InvalidationBus(mock_db["invalidations"], worker="writer")
+        reader = InvalidationBus(mock_db["invalidations"], worker="reader")
+        products, admins = Recorder(reader, "products"), Recorder(reader, "admins")
+        writer.announce(kind, keys)
+        await writer.stop()
+        await reader.sync()
+        return products, admins
+
+    products, admins = asyncio.run(scenario())
+    received = products if kind == "products" else admins
+    other = admins if kind == "products" else products
+    assert received.calls == [keys]
+    assert other.calls == []
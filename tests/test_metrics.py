@@ -0,0 +1,31 @@
+import ipaddress
+
+from starlette.requests import Request
+
+import metrics
+
+
+def _request(host="127.0.0.1", authorization=None):
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request({"type": "http", "method": "GET", "path": "/metrics", "headers": headers, "client": (host, 50000)})
+
+
+def test_scrapes_are_refused_without_a_token_even_from_loopback(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "")
+    monkeypatch.setattr(metrics, "ALLOWED_NETWORKS", ())
+    assert not metrics._allowed(_request())
+
+
+def test_the_token_is_required_when_set(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-secret")
+    monkeypatch.setattr(metrics, "ALLOWED_NETWORKS", (ipaddress.ip_network("127.0.0.0/8"),))
+    assert metrics._allowed(_request("203.0.113.7", "Bearer scrape-secret"))
+    assert not metrics._allowed(_request("127.0.0.1"))
+    assert not metrics._allowed(_request("127.0.0.1", "Bearer wrong"))
+
+
+def test_allowed_networks_replace_the_token_when_configured(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "")
+    monkeypatch.setattr(metrics, "ALLOWED_NETWORKS", (ipaddress.ip_network("10.0.0.0/8"),))
+    assert metrics._allowed(_request("10.1.2.3"))
+    assert not metrics._allowed(_request("127.0.0.1"))
@@ -0,0 +1,45 @@
+from base64 import urlsafe_b64encode
+from datetime import datetime
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import after_filter, decode_cursor, encode_cursor
+
+
+def _raw_cursor(value) -> str:
+    return urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("doc_id", ["p-1", "ürün/ş?=&", ""])
+def test_cursor_round_trip(doc_id):
+    created_at = datetime(2024, 5, 17, 9, 30, 12, 345678)
+    cursor = encode_cursor({"created_at": created_at, "id": doc_id, "name": {"tr": "ignored"}})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, doc_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _raw_cursor("just a string"),
+    _raw_cursor({"created_at": "2024-01-01"}),
+    _raw_cursor(["2024-01-01T00:00:00"]),
+    _raw_cursor(["yesterday", "p-1"]),
+    _raw_cursor([20240101, "p-1"]),
+    "",
+])
+def test_bad_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_after_filter_follows_sort_direction():
+    created_at = datetime(2024, 1, 2)
+    cursor = encode_cursor({"created_at": created_at, "id": "p-1"})
+    assert after_filter(cursor, [("created_at", 1), ("id", 1)]) == {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "id": {"$gt": "p-1"}},
+    ]}
+    assert after_filter(cursor, [("created_at", -1), ("id", -1)])["$or"][0] == {"created_at": {"$lt": created_at}}
@@ -0,0 +1,127 @@
+from datetime import datetime
+import asyncio
+import io
+import json
+
+import pytest
+
+import product_io
+from product_io import ProductImporter, csv_rows, ndjson_rows
+
+CREATED = datetime(2024, 1, 1)
+EXISTING = {
+    "id": "p1",
+    "category_id": "cat-1",
+    "name": {"tr": "Buhar Kazanı", "en": "Steam Boiler"},
+    "description": {"tr": "Açıklama"},
+    "specs": {"power": "6 KW"},
+    "features": {"tr": ["Paslanmaz"]},
+    "price": "100",
+    "is_active": False,
+    "images": ["/api/uploads/a.png"],
+    "created_at": CREATED,
+    "updated_at": CREATED,
+}
+
+
+@pytest.fixture
+def products(mock_db, monkeypatch):
+    monkeypatch.setattr(product_io, "products_collection", mock_db["products"])
+    monkeypatch.setattr(product_io, "categories_collection", mock_db["categories"])
+    # The in-memory views and the invalidation bus are not under test here
+    monkeypatch.setattr(product_io.catalog_events, "products_saved", lambda docs, previous_category_ids=(): None)
+
+    async def setup():
+        await mock_db["categories"].insert_one({"id": "cat-1", "slug": "steam"})
+        await mock_db["products"].insert_one(dict(EXISTING))
+
+    asyncio.run(setup())
+    return mock_db["products"]
+
+
+def _import(body: bytes, csv: bool = False, ordered: bool = False):
+    spool = io.BytesIO(body)
+    rows = csv_rows(spool) if csv else ndjson_rows(spool)
+    return asyncio.run(ProductImporter(ordered=ordered, merge=csv).run(rows))
+
+
+def _stored(collection, product_id):
+    return asyncio.run(collection.find_one({"id": product_id}, {"_id": 0}))
+
+
+def test_price_only_csv_keeps_every_other_field(products):
+    report = _import(b"id,category_id,price\np1,steam,250\n", csv=True)
+    assert (report["updated"], report["failed"]) == (1, 0)
+    stored = _stored(products, "p1")
+    assert stored["price"] == "250"
+    assert stored["updated_at"] > CREATED
+    for field in ("name", "description", "specs", "features", "is_active", "images", "created_at"):
+        assert stored[field] == EXISTING[field]
+
+
+def test_csv_column_updates_one_language(products):
+    _import("id,name.en,specs.voltage\np1,Boiler,220V\n".encode(), csv=True)
+    stored = _stored(products, "p1")
+    assert stored["name"] == {"tr": "Buhar Kazanı", "en": "Boiler"}
+    assert stored["specs"] == {"power": "6 KW", "voltage": "220V"}
+
+
+def test_ndjson_object_replaces_the_field(products):
+    _import(json.dumps({"id": "p1", "name": {"en": "Boiler"}}).encode())
+    stored = _stored(products, "p1")
+    assert stored["name"] == {"en": "Boiler"}
+    assert stored["description"] == EXISTING["description"]
+
+
+def test_upsert_creating_a_product_fills_defaults(products):
+    report = _import(b"id,category_id,name.tr\np2,steam,Yeni\n", csv=True)
+    assert (report["inserted"], report["failed"]) == (1, 0)
+    stored = _stored(products, "p2")
+    assert stored["name"] == {"tr": "Yeni"}
+    assert stored["category_id"] == "cat-1"
+    assert (stored["description"], stored["specs"], stored["features"], stored["images"]) == ({}, {}, {}, [])
+    assert stored["is_active"] is True
+
+
+def test_new_products_need_a_name(products):
+    body = b"id,category_id,name.tr,price\np3,steam,,10\n,steam,,20\n,steam,Yeni,30\n"
+    report = _import(body, csv=True)
+    assert (report["inserted"], report["failed"]) == (1, 2)
+    assert [(error["row"], error["id"]) for error in report["errors"]] == [(2, "p3"), (3, None)]
+    assert "name" in report["errors"][0]["detail"] and "name" in report["errors"][1]["detail"]
+    assert _stored(products, "p3") is None
+    assert asyncio.run(products.count_documents({})) == 2
+
+
+def test_row_without_fields_is_an_error(products):
+    report = _import(json.dumps({"id": "p1", "images": ["/x.png"]}).encode())
+    assert report["failed"] == 1
+    assert _stored(products, "p1")["images"] == EXISTING["images"]
+
+
+def test_undecodable_rows_fail_alone(products):
+    csv_body = "id,price,name.tr\np1,1,Kazan ş\n".encode("cp1254") + b"p1,2,\n"
+    report = _import(csv_body, csv=True)
+    assert (report["updated"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["row"] == 2 and "UTF-8" in report["errors"][0]["detail"]
+    assert _stored(products, "p1")["price"] == "2"
+
+    report = _import(b'{"id": "p1", "price": "\xff"}\n{"id": "p1", "price": "3"}\n')
+    assert (report["updated"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["row"] == 1
+
+
+def test_ordered_import_stops_at_the_first_failing_row(products):
+    report = _import(b"id,price\np1,5\np9,6\np1,7\n", csv=True, ordered=True)
+    assert report["stopped_at_row"] == 3
+    assert report["processed"] == 3
+    assert _stored(products, "p1")["price"] == "5"
+
+
+def test_unknown_or_undecodable_csv_header_is_400(products):
+    from fastapi import HTTPException
+
+    for body in (b"id,colour\np1,red\n", "ıd,price\n".encode("cp1254")):
+        with pytest.raises(HTTPException) as exc_info:
+            _import(body, csv=True)
+        assert exc_info.value.status_code == 400
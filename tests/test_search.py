@@ -0,0 +1,78 @@
+import pytest
+
+from search import SearchIndex, normalize, tokenize
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("İSTANBUL", "istanbul"),
+    ("KIRMIZI", "kirmizi"),
+    ("ışık", "isik"),
+    ("Şişe Çağrı Gözlük Ütü", "sise cagri gozluk utu"),
+    ("Kâğıt", "kagit"),
+])
+def test_turkish_normalize(text, expected):
+    assert normalize(text, "tr") == expected
+
+
+def test_dotless_i_depends_on_language():
+    # Outside Turkish, I lowercases to i and İ keeps its combining dot
+    assert normalize("I", "en") == "i"
+    assert normalize("İ", "tr") == "i"
+
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize("Paslanmaz-Çelik, 3.5 KW", "tr") == ["paslanmaz", "celik", "3", "5", "kw"]
+
+
+def _product(product_id, name, is_active=True, **extra):
+    return {"id": product_id, "category_id": "c", "name": {"tr": name}, "is_active": is_active, **extra}
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.rebuild([
+        _product("kazan", "Buhar Kazanı", specs={"power": "6 KW"}),
+        _product("kazak", "Kazak Ütüsü"),
+        _product("jenerator", "Buhar Jeneratörü", description={"tr": "Kazan dairesi için"}),
+        _product("pasif", "Buhar Kazanı Eski", is_active=False),
+    ])
+    return index
+
+
+def _ids(results):
+    return [doc["id"] for doc in results[0]]
+
+
+def test_search_folds_turkish_letters(index):
+    assert _ids(index.search("KAZANI", "tr")) == ["kazan"]
+    assert _ids(index.search("jeneratoru", "tr")) == ["jenerator"]
+
+
+def test_last_term_matches_as_prefix(index):
+    # The generator only mentions a boiler in its description, so it ranks lower
+    assert _ids(index.search("buhar kaz", "tr")) == ["kazan", "jenerator"]
+    assert _ids(index.search("buhar kazak", "tr")) == []
+    docs, suggestions = index.search("ka", "tr")
+    # A name hit ranks above a description hit
+    assert [doc["id"] for doc in docs] == ["kazak", "kazan", "jenerator"]
+    assert suggestions == ["kazak", "kazan", "kazani"]
+
+
+def test_earlier_terms_must_match_exactly(index):
+    assert _ids(index.search("buh kazani", "tr")) == []
+
+
+def test_single_letter_is_not_a_prefix(index):
+    assert _ids(index.search("k", "tr")) == []
+
+
+def test_inactive_and_removed_products_are_not_found(index):
+    assert "pasif" not in _ids(index.search("eski", "tr"))
+    assert _ids(index.search("eski", "tr", active_only=False)) == ["pasif"]
+    index.remove("kazak")
+    assert _ids(index.search("kazak", "tr")) == []
+
+
+def test_spec_values_are_searchable_in_every_language(index):
+    assert _ids(index.search("6 kw", "en")) == ["kazan"]
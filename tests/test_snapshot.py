@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from snapshot import CatalogSnapshot
+
+START = datetime(2024, 1, 1)
+
+
+def _product(product_id, category_id="steam", minutes=0, **extra):
+    return {"id": product_id, "category_id": category_id, "created_at": START + timedelta(minutes=minutes), **extra}
+
+
+def test_documents_missing_indexed_fields_are_skipped(caplog):
+    loaded = CatalogSnapshot(
+        [_product("a"), {"id": "no-date", "category_id": "steam"}, {"id": "no-category", "created_at": START}],
+        [{"id": "steam", "slug": "steam-generator"}, {"id": "no-slug"}],
+    )
+    assert [doc["id"] for doc in loaded.products] == ["a"]
+    assert list(loaded.category_by_id) == ["steam"]
+    assert "no-date without created_at" in caplog.text
+
+    # A malformed update drops the product rather than the whole snapshot
+    updated = loaded.with_products([{"id": "a", "category_id": None, "created_at": START}])
+    assert len(updated) == 0
+    assert loaded.with_category({"id": "steam", "slug": None}).categories == ()
+
+
+def _catalog():
+    return CatalogSnapshot(
+        [
+            _product("b", minutes=1, is_active=True, specs={"voltage": "220V"}),
+            _product("a", minutes=1, is_active=False, specs={"voltage": "380V"}),
+            _product("c", "vacuum", minutes=2, is_active=True, specs={"voltage": " 220V "}),
+            _product("d", minutes=3, is_active=True),
+        ],
+        [{"id": "steam", "slug": "steam-generator"}],
+    )
+
+
+def test_products_are_ordered_by_created_at_then_id():
+    assert [doc["id"] for doc in _catalog().products] == ["a", "b", "c", "d"]
+
+
+def test_select_filters_by_category_activity_and_specs():
+    catalog = _catalog()
+    assert [doc["id"] for doc in catalog.select(category_id="steam")] == ["a", "b", "d"]
+    assert [doc["id"] for doc in catalog.select(is_active=True)] == ["b", "c", "d"]
+    assert [doc["id"] for doc in catalog.select(specs={"voltage": ["220V"]})] == ["b", "c"]
+    assert list(catalog.select(category_id="unknown")) == []
+
+
+def test_pages_follow_the_cursor():
+    catalog = _catalog()
+    first, cursor = catalog.page(limit=2)
+    second, last = catalog.page(limit=2, after=cursor)
+    assert [doc["id"] for doc in first + second] == ["a", "b", "c", "d"]
+    assert last is None
+
+
+def test_with_products_replaces_adds_and_removes_without_touching_the_original():
+    catalog = _catalog()
+    updated = catalog.with_products(
+        [_product("b", "vacuum", minutes=1, specs={"voltage": "380V"}), _product("e", minutes=0)],
+        deleted_ids=["d"],
+    )
+    assert [doc["id"] for doc in updated.products] == ["e", "a", "b", "c"]
+    assert [doc["id"] for doc in updated.select(category_id="vacuum")] == ["b", "c"]
+    assert [doc["id"] for doc in updated.select(category_id="steam")] == ["e", "a"]
+    # Readers holding the previous snapshot keep a consistent view
+    assert [doc["id"] for doc in catalog.products] == ["a", "b", "c", "d"]
+    assert catalog.product_by_id["b"]["category_id"] == "steam"
+
+
+def test_stored_documents_match_what_mongodb_returns():
+    catalog = CatalogSnapshot([{**_product("a"), "_id": "oid", "created_at": datetime(2024, 1, 1, 0, 0, 0, 123456)}])
+    assert "_id" not in catalog.products[0]
+    assert catalog.products[0]["created_at"].microsecond == 123000
@@ -0,0 +1,28 @@
+import asyncio
+from collections import Counter
+import os
+
+import timing
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(timing, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(timing, "PROFILE_MAX_FILES", 2)
+    for i, profile_id in enumerate(("a" * 32, "b" * 32, "c" * 32)):
+        timing.save_profile(profile_id, Counter({"main;handler": i + 1}))
+        os.utime(timing.profile_path(profile_id), (1000 + i, 1000 + i))
+    timing.save_profile("d" * 32, Counter({"main;handler": 4}))
+
+    assert sorted(path.stem for path in tmp_path.iterdir()) == ["c" * 32, "d" * 32]
+    assert timing.profile_path("d" * 32).read_text() == "main;handler 4\n"
+
+
+def test_profiling_is_skipped_when_the_admin_check_fails(monkeypatch):
+    import auth
+
+    async def unreachable(credentials):
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(auth, "get_current_admin", unreachable)
+    scope = {"type": "http", "headers": [(b"authorization", b"Bearer token")]}
+    assert asyncio.run(timing._is_admin(scope)) is False
@@ -0,0 +1,59 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from uploads import UploadsStaticFiles, parse_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=0-0", (0, 1)),
+    ("bytes=500-", (500, SIZE)),
+    ("bytes=900-5000", (900, SIZE)),
+    ("bytes=-100", (900, SIZE)),
+    ("bytes=-5000", (0, SIZE)),
+    (" bytes = 10-19 ", (10, 20)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["items=0-9", "bytes=0-9,20-29", "bytes=abc-", "bytes=1-x", "bytes=-"])
+def test_parse_range_ignores_unsupported_headers(header):
+    assert parse_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", SIZE),
+    ("bytes=2000-2100", SIZE),
+    ("bytes=50-10", SIZE),
+    ("bytes=-0", SIZE),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+@pytest.fixture
+def uploads_client(tmp_path):
+    (tmp_path / "image.png").write_bytes(bytes(range(256)) * 4)
+    app = Starlette(routes=[Mount("/uploads", UploadsStaticFiles(directory=str(tmp_path)))])
+    return TestClient(app)
+
+
+def test_range_request_is_206(uploads_client):
+    response = uploads_client.get("/uploads/image.png", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.content == bytes(range(10, 20))
+
+
+def test_unsatisfiable_range_is_416(uploads_client):
+    response = uploads_client.get("/uploads/image.png", headers={"Range": "bytes=5000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"